@@ -0,0 +1,67 @@
+"""
+Benchmark of BFS node expansions per second with and without the
+precomputed co-star index.
+
+Every run performs a full breadth-first search (degrees.search_tree
+with no targets) from the same random sources; an expansion is one
+person taken off the queue, i.e. one neighbors_for_person call.
+
+Usage: python bench_costars.py directory [--sources S] [--compact]
+"""
+
+import argparse
+import random
+import time
+
+import degrees
+
+
+def expand_all(sources):
+    """
+    Returns (expansions, seconds) for full searches from every source.
+    """
+    expansions = 0
+    start = time.perf_counter()
+    for source in sources:
+        expansions += len(degrees.search_tree(source))
+    return expansions, time.perf_counter() - start
+
+
+def report(label, expansions, seconds):
+    print(f"{label:<22}{expansions:>12}{seconds:>10.3f}"
+          f"{expansions / seconds:>16.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--sources", type=int, default=5)
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=args.compact)
+    rng = random.Random(args.seed)
+    sources = rng.sample(sorted(degrees.people),
+                         min(args.sources, len(degrees.people)))
+
+    print(f"{'mode':<22}{'expansions':>12}{'seconds':>10}"
+          f"{'expansions/sec':>16}")
+
+    degrees.drop_costar_index()
+    report("no index", *expand_all(sources))
+
+    start = time.perf_counter()
+    degrees.build_costar_index()
+    print(f"eager index built in {time.perf_counter() - start:.3f}s")
+    report("eager index", *expand_all(sources))
+
+    degrees.build_costar_index(lazy=True)
+    report("lazy index, cold", *expand_all(sources))
+    report("lazy index, warm", *expand_all(sources))
+    print(f"lazy index holds {len(degrees.costars)} of "
+          f"{len(degrees.people)} people")
+
+
+if __name__ == "__main__":
+    main()
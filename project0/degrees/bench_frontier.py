@@ -0,0 +1,120 @@
+"""
+Micro-benchmark comparing the list-slicing frontiers that util.py used
+to ship with the indexed frontiers that replaced them.
+
+The legacy frontiers are run up to --legacy-max nodes. At larger sizes
+their times are extrapolated from the largest run (add grows linearly,
+each contains_state probe linearly, and draining quadratically) and
+marked "(extrapolated)".
+
+Usage: python bench_frontier.py [--sizes 100000 1000000] [--legacy-max N]
+"""
+
+import argparse
+import time
+
+from util import Node, IndexedQueueFrontier, IndexedStackFrontier
+
+
+class LegacyStackFrontier():
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class LegacyQueueFrontier(LegacyStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def run(frontier_class, size, probes):
+    """
+    Fill a frontier with `size` nodes, probe it with `probes`
+    contains_state calls, then drain it. Returns seconds per phase.
+    """
+    nodes = [Node(state=i, parent=None, action=None) for i in range(size)]
+    frontier = frontier_class()
+
+    start = time.perf_counter()
+    for node in nodes:
+        frontier.add(node)
+    added = time.perf_counter()
+
+    step = max(1, size // probes)
+    for state in range(0, size, step):
+        frontier.contains_state(state)
+    probed = time.perf_counter()
+
+    while not frontier.empty():
+        frontier.remove()
+    drained = time.perf_counter()
+
+    return added - start, probed - added, drained - probed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100_000, 300_000, 1_000_000])
+    parser.add_argument("--probes", type=int, default=1000,
+                        help="contains_state calls per run")
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest size to run the quadratic legacy "
+                             "frontiers at")
+    args = parser.parse_args()
+
+    classes = [
+        ("legacy stack", LegacyStackFrontier, True),
+        ("legacy queue", LegacyQueueFrontier, True),
+        ("indexed stack", IndexedStackFrontier, False),
+        ("indexed queue", IndexedQueueFrontier, False),
+    ]
+
+    print(f"{'frontier':<15}{'size':>10}{'add':>10}{'contains':>10}"
+          f"{'remove':>10}")
+    measured = {}
+    for size in sorted(args.sizes):
+        for label, frontier_class, legacy in classes:
+            note = ""
+            if legacy and size > args.legacy_max:
+                if label not in measured:
+                    measured[label] = (args.legacy_max,
+                                       run(frontier_class, args.legacy_max,
+                                           args.probes))
+                base, (add, contains, remove) = measured[label]
+                scale = size / base
+                add, contains, remove = (add * scale, contains * scale,
+                                         remove * scale * scale)
+                note = "  (extrapolated)"
+            else:
+                add, contains, remove = run(frontier_class, size, args.probes)
+                if legacy:
+                    measured[label] = (size, (add, contains, remove))
+            print(f"{label:<15}{size:>10}{add:>10.3f}{contains:>10.3f}"
+                  f"{remove:>10.3f}{note}")
+
+
+if __name__ == "__main__":
+    main()
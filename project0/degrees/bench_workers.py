@@ -0,0 +1,68 @@
+"""
+Scaling benchmark for batch queries answered in a process pool.
+
+Loads a dataset once, draws random source/target pairs among people
+with unique names, and times degrees.run_batch for 1 up to N workers.
+
+Usage: python bench_workers.py directory [--queries Q] [--sources S]
+                               [--max-workers N] [--compact]
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+
+import degrees
+
+
+def random_queries(count, sources, seed):
+    """
+    Returns `count` CSV lines over `sources` distinct source people.
+    """
+    rng = random.Random(seed)
+    unique = sorted(name for name, ids in degrees.names.items() if len(ids) == 1)
+    chosen = rng.sample(unique, min(sources, len(unique)))
+
+    lines = io.StringIO()
+    writer = csv.writer(lines)
+    for _ in range(count):
+        writer.writerow([rng.choice(chosen), rng.choice(unique)])
+    return lines.getvalue().splitlines()
+
+
+class Discard():
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--sources", type=int, default=200,
+                        help="distinct sources, i.e. search trees, per run")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=args.compact)
+    lines = random_queries(args.queries, args.sources, args.seed)
+
+    print(f"{'workers':>8}{'seconds':>10}{'queries/sec':>14}{'speedup':>9}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        count, elapsed = degrees.run_batch(lines, Discard(), workers=workers)
+        rate = count / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8}{elapsed:>10.3f}{rate:>14.1f}"
+              f"{rate / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
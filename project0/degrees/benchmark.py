@@ -0,0 +1,135 @@
+"""
+Benchmark harness for degrees across dataset scales.
+
+For every scale (rows of stars.csv) a synthetic dataset is generated
+once under --data, then each representation is measured in a fresh
+interpreter: load_data time, mean neighbors_for_person time over random
+people, and mean shortest_path time (plain and bidirectional) over
+random pairs. Results are written as JSON with the run's settings and
+machine details so files from different runs can be compared.
+
+Usage: python benchmark.py [--scales 1000 100000 ...] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import degrees
+from generate import generate
+
+MODES = ("dict", "compact")
+
+
+def measure(directory, mode, people_sample, pairs, seed):
+    """
+    Times one representation of one dataset in this process.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=mode == "compact", details=False)
+    load = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    sample = [rng.choice(person_ids) for _ in range(people_sample)]
+    start = time.perf_counter()
+    tuples = 0
+    for person_id in sample:
+        tuples += len(degrees.neighbors_for_person(person_id))
+    neighbors = (time.perf_counter() - start) / len(sample)
+
+    queries = [(rng.choice(person_ids), rng.choice(person_ids))
+               for _ in range(pairs)]
+    result = {
+        "load_seconds": load,
+        "neighbors_us": neighbors * 1e6,
+        "neighbor_tuples_mean": tuples / len(sample),
+    }
+    for label, bidirectional in (("bfs", False), ("bidirectional", True)):
+        start = time.perf_counter()
+        connected = 0
+        for source, target in queries:
+            if degrees.shortest_path(source, target, bidirectional) is not None:
+                connected += 1
+        result[f"{label}_ms"] = (time.perf_counter() - start) / len(queries) * 1e3
+        result["connected_fraction"] = connected / len(queries)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+",
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--data", default="bench_data",
+                        help="where generated datasets are kept")
+    parser.add_argument("--people", type=int, default=1000,
+                        help="people sampled for neighbors_for_person")
+    parser.add_argument("--pairs", type=int, default=50,
+                        help="random pairs per shortest_path mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--child", nargs=2, metavar=("DIRECTORY", "MODE"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        directory, mode = args.child
+        print(json.dumps(measure(directory, mode, args.people, args.pairs,
+                                 args.seed)))
+        return
+
+    runs = []
+    print(f"{'stars':>10}{'mode':>9}{'load s':>9}{'neigh us':>10}"
+          f"{'bfs ms':>10}{'bidir ms':>10}")
+    for scale in args.scales:
+        directory = os.path.join(args.data, f"stars_{scale}_seed_{args.seed}")
+        if not os.path.exists(os.path.join(directory, "stars.csv")):
+            generate(directory, scale, args.seed)
+
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", directory, mode,
+                 "--people", str(args.people), "--pairs", str(args.pairs),
+                 "--seed", str(args.seed)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            runs.append({"stars": scale, "mode": mode, **result})
+            print(f"{scale:>10}{mode:>9}{result['load_seconds']:>9.2f}"
+                  f"{result['neighbors_us']:>10.1f}{result['bfs_ms']:>10.2f}"
+                  f"{result['bidirectional_ms']:>10.2f}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+        "settings": {"people": args.people, "pairs": args.pairs,
+                     "seed": args.seed},
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
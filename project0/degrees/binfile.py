@@ -0,0 +1,75 @@
+"""
+Versioned binary files shared by snapshot.py and landmarks.py.
+
+A file is a fixed preamble (magic, format version, header length), a
+JSON header and, from the next 8-byte boundary, the body. The header
+records the body size, so a truncated or overlong file is rejected
+before any of the body is read.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+PREAMBLE = struct.Struct("<8sII")
+ALIGN = 8
+
+# What reading a damaged file can raise; loaders treat these as a
+# missing file so the data is rebuilt
+DECODE_ERRORS = (struct.error, ValueError, IndexError, KeyError, TypeError)
+
+
+def save(path, magic, version, header, chunks):
+    """
+    Writes `header` (a JSON object) and the body `chunks` (bytes-like
+    objects, written back to back). The file is written to a temporary
+    name and renamed into place so readers never see a partial file.
+    """
+    size = sum(memoryview(chunk).nbytes for chunk in chunks)
+    header = json.dumps(dict(header, size=size)).encode("utf-8")
+    start = padded(PREAMBLE.size + len(header))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(magic, version, len(header)))
+        f.write(header)
+        f.write(b"\0" * (start - PREAMBLE.size - len(header)))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temporary, path)
+
+
+def load(path, magic, version):
+    """
+    Memory-maps a file written by save. Returns (header, body), body
+    being a memoryview into the mapping, or None if the file is
+    missing, of another kind or version, or not the size its header
+    says.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+
+    with f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    try:
+        file_magic, file_version, length = PREAMBLE.unpack_from(mapping)
+        if file_magic != magic or file_version != version:
+            return None
+        header = json.loads(mapping[PREAMBLE.size:PREAMBLE.size + length])
+        start = padded(PREAMBLE.size + length)
+        if start + header["size"] != len(mapping):
+            return None
+    except DECODE_ERRORS:
+        return None
+    return header, memoryview(mapping)[start:]
+
+
+def padded(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
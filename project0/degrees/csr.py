@@ -0,0 +1,225 @@
+"""
+Compact integer-indexed co-star graph.
+
+Person and movie IDs are interned to dense integers and the
+person -> movie and movie -> person adjacency is stored in compressed
+sparse row form: for person p, the movies are
+person_movies[person_offsets[p]:person_offsets[p + 1]], and likewise
+for the stars of a movie. IDs are mapped back to indices by binary
+search over person_order and movie_order, the indices sorted by ID.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from ingest import read_rows
+
+# Typecode for every index buffer (signed 32 bit)
+INDEX = "i"
+
+
+class CSRGraph():
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people, person_order=None,
+                 movie_order=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_order = _sort_order(person_ids) if person_order is None \
+            else person_order
+        self.movie_order = _sort_order(movie_ids) if movie_order is None \
+            else movie_order
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edge_people, edge_movies):
+        """
+        Builds the graph from parallel arrays of (person, movie) integer
+        edges, bucketing them with a counting sort in both directions.
+        """
+        person_offsets, person_movies = _bucket(
+            len(person_ids), edge_people, edge_movies)
+        movie_offsets, movie_people = _bucket(
+            len(movie_ids), edge_movies, edge_people)
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    @classmethod
+    def from_stars(cls, person_ids, movie_ids, filename, progress=False):
+        """
+        Builds the graph from already loaded ID lists and a stars.csv file.
+        Rows naming an unknown person or movie are skipped.
+        """
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        edge_people = array(INDEX)
+        edge_movies = array(INDEX)
+        for person_id, movie_id in read_rows(filename, ("person_id", "movie_id"),
+                                             progress=progress):
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is None or m is None:
+                continue
+            edge_people.append(p)
+            edge_movies.append(m)
+        return cls.from_edges(person_ids, movie_ids, edge_people, edge_movies)
+
+    def person_position(self, person_id):
+        """
+        Index of person_id; raises KeyError if it is not in the graph.
+        """
+        return _find(self.person_ids, self.person_order, person_id)
+
+    def movie_position(self, movie_id):
+        """
+        Index of movie_id; raises KeyError if it is not in the graph.
+        """
+        return _find(self.movie_ids, self.movie_order, movie_id)
+
+    def movies_of(self, p):
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_of(self, m):
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        movie_ids = self.movie_ids
+        person_ids = self.person_ids
+        neighbors = set()
+        for m in self.movies_of(self.person_position(person_id)):
+            for q in self.stars_of(m):
+                neighbors.add((movie_ids[m], person_ids[q]))
+        return neighbors
+
+    def shortest_path(self, source, target, profile=None):
+        """
+        Breadth-first search over integer indices. Returns the shortest
+        list of (movie_id, person_id) pairs from source to target, or
+        None if they are not connected. Expansions and the frontier peak
+        are recorded on `profile` when one is given.
+        """
+        s = self.person_position(source)
+        t = self.person_position(target)
+        if s == t:
+            return []
+
+        # parent_person[q] == -1 means q has not been reached yet
+        parent_person = array(INDEX, [-1]) * len(self.person_ids)
+        parent_movie = array(INDEX, [-1]) * len(self.person_ids)
+        parent_person[s] = s
+
+        queue = deque([s])
+        while queue:
+            p = queue.popleft()
+            if profile is not None:
+                profile.count("nodes_expanded")
+                profile.peak("frontier", len(queue) + 1)
+            for m in self.movies_of(p):
+                for q in self.stars_of(m):
+                    if parent_person[q] != -1:
+                        continue
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    if q == t:
+                        return self._walk_back(s, t, parent_person, parent_movie)
+                    queue.append(q)
+        return None
+
+    def search_tree(self, source, targets=None, profile=None):
+        """
+        Breadth-first search over integer indices from source, returning
+        the same {person_id: (movie_id, person_id)} tree as
+        degrees.search_tree. The dict is only built once the search is
+        done. When `targets` is given the search stops as soon as all of
+        them have been reached.
+        """
+        s = self.person_position(source)
+        remaining = None
+        if targets is not None:
+            remaining = {self.person_position(target) for target in targets}
+            remaining.discard(s)
+
+        parent_person = array(INDEX, [-1]) * len(self.person_ids)
+        parent_movie = array(INDEX, [-1]) * len(self.person_ids)
+        parent_person[s] = s
+        reached = []
+
+        queue = deque([s] if remaining is None or remaining else [])
+        while queue:
+            p = queue.popleft()
+            if profile is not None:
+                profile.count("nodes_expanded")
+                profile.peak("frontier", len(queue) + 1)
+            for m in self.movies_of(p):
+                for q in self.stars_of(m):
+                    if parent_person[q] != -1:
+                        continue
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    reached.append(q)
+                    queue.append(q)
+                    if remaining is not None:
+                        remaining.discard(q)
+                        if not remaining:
+                            queue.clear()
+                            break
+                else:
+                    continue
+                break
+
+        person_ids = self.person_ids
+        movie_ids = self.movie_ids
+        tree = {source: None}
+        for q in reached:
+            tree[person_ids[q]] = (movie_ids[parent_movie[q]],
+                                   person_ids[parent_person[q]])
+        return tree
+
+    def _walk_back(self, s, t, parent_person, parent_movie):
+        path = []
+        q = t
+        while q != s:
+            path.append((self.movie_ids[parent_movie[q]], self.person_ids[q]))
+            q = parent_person[q]
+        path.reverse()
+        return path
+
+
+def _sort_order(ids):
+    """
+    Indices of ids in the sorted order of the IDs.
+    """
+    return array(INDEX, sorted(range(len(ids)), key=ids.__getitem__))
+
+
+def _find(ids, order, id):
+    k = bisect_left(order, id, key=ids.__getitem__)
+    if k == len(order) or ids[order[k]] != id:
+        raise KeyError(id)
+    return order[k]
+
+
+def _bucket(count, keys, values):
+    """
+    Counting sort of `values` by `keys` into (offsets, values) CSR buffers.
+    """
+    offsets = array(INDEX, [0]) * (count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array(INDEX, offsets[:-1])
+    bucketed = array(INDEX, [0]) * len(values)
+    for key, value in zip(keys, values):
+        bucketed[cursor[key]] = value
+        cursor[key] += 1
+    return offsets, bucketed
@@ -1,6 +1,21 @@
+import argparse
 import csv
+import json
+import multiprocessing
 import sys
+import time
+from array import array
+from collections import deque
+from contextlib import nullcontext
 
+import snapshot
+from binfile import DECODE_ERRORS
+from csr import INDEX, CSRGraph
+from instrument import Profile
+from ingest import read_rows
+from landmarks import LandmarkIndex, default_path as landmarks_path
+from lru import LRUCache
+from nameindex import NameIndex
 from util import *
 
 # Maps names to a set of corresponding person_ids
@@ -12,70 +27,364 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# (names, people and movies are read-only snapshot.NameTable and
+# snapshot.Records views when loaded from a snapshot)
 
-def load_data(directory):
+# NameIndex over names for prefix and fuzzy lookups
+name_index = None
+
+# Compact CSRGraph of the stars when loaded with compact=True; in that
+# case people and movies hold no "movies"/"stars" sets
+graph = None
+
+# Maps person_ids to a tuple of (movie_id, person_id) pairs, one per
+# co-star, once build_costar_index has been called
+costars = None
+
+# LandmarkIndex used to rule out and prune searches, see use_landmarks
+landmarks = None
+
+# LRUCaches of (source, target) -> path and source -> (tree, complete),
+# see enable_cache
+path_cache = None
+tree_cache = None
+
+# Keyword arguments of the last load_data call, used to reload in
+# spawned workers and to find the CSVs again for load_details
+loaded_with = None
+
+# Whether birth, title and year are in people and movies
+details_loaded = False
+
+# Profile collecting counters and timers, see start_profile
+profile = None
+
+
+def load_data(directory, compact=False, use_snapshot=False, details=True,
+              progress=False):
     """
     Load data from CSV files into memory.
+
+    With compact=True the star relation is stored as an integer-indexed
+    CSRGraph instead of per-person and per-movie sets.
+
+    With use_snapshot=True (which implies compact) the data is
+    memory-mapped from a binary snapshot next to the CSVs when one
+    exists for their current sizes and mtimes; otherwise the CSVs are
+    parsed and a fresh snapshot is written for the next run.
+
+    With details=False only the columns path search needs are read;
+    birth, title and year are filled in later by load_details. With
+    progress=True rows/sec are reported on stderr while reading.
     """
+    global graph, loaded_with, details_loaded, name_index
+
+    loaded_with = {"directory": directory, "compact": compact,
+                   "use_snapshot": use_snapshot, "details": details}
+
+    if use_snapshot:
+        compact = True
+        key = snapshot.source_key(directory)
+        with timed("load.snapshot"):
+            loaded = load_snapshot(directory, key)
+        if loaded:
+            with timed("load.name_index"):
+                name_index = NameIndex(names, keys=names.sorted_keys)
+            return
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    columns = ("id", "name", "birth") if details else ("id", "name")
+    with timed("load.people"):
+        for row in read_rows(f"{directory}/people.csv", columns,
+                             intern=("id",), progress=progress):
+            person_id, name = row[0], row[1]
+            person = {"name": name}
+            if details:
+                person["birth"] = row[2]
+            if not compact:
+                person["movies"] = set()
+            people[person_id] = person
+            names.setdefault(name.lower(), set()).add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    columns = ("id", "title", "year") if details else ("id",)
+    with timed("load.movies"):
+        for row in read_rows(f"{directory}/movies.csv", columns,
+                             intern=("id",), progress=progress):
+            movie = {"title": row[1], "year": row[2]} if details else {}
+            if not compact:
+                movie["stars"] = set()
+            movies[row[0]] = movie
+
+    details_loaded = details
+    with timed("load.name_index"):
+        name_index = NameIndex(names)
+
+    if compact:
+        with timed("load.stars"):
+            graph = CSRGraph.from_stars(list(people), list(movies),
+                                        f"{directory}/stars.csv",
+                                        progress=progress)
+        if use_snapshot:
+            with timed("load.save_snapshot"):
+                save_snapshot(directory, key)
+        if profile is not None:
+            profile.count("load.people", len(people))
+            profile.count("load.movies", len(movies))
+            profile.count("load.stars", len(graph.person_movies))
+        return
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    rows = 0
+    with timed("load.stars"):
+        for person_id, movie_id in read_rows(f"{directory}/stars.csv",
+                                             ("person_id", "movie_id"),
+                                             intern=("person_id", "movie_id"),
+                                             progress=progress):
+            rows += 1
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
             except KeyError:
                 pass
+    if profile is not None:
+        profile.count("load.people", len(people))
+        profile.count("load.movies", len(movies))
+        profile.count("load.stars", rows)
+
+
+def start_profile():
+    """
+    Starts collecting counters and timers for loading and searching.
+    Returns the Profile.
+    """
+    global profile
+    profile = Profile()
+    return profile
+
+
+def timed(name):
+    """
+    Context manager timing `name` when profiling, else doing nothing.
+    """
+    if profile is None:
+        return nullcontext()
+    return profile.timer(name)
+
+
+def load_details():
+    """
+    Reads birth, title and year for data loaded with details=False.
+    Does nothing if they are already loaded.
+    """
+    global details_loaded
+
+    if details_loaded:
+        return
+    directory = loaded_with["directory"]
+
+    for person_id, birth in read_rows(f"{directory}/people.csv",
+                                      ("id", "birth")):
+        if person_id in people:
+            people[person_id]["birth"] = birth
+    for movie_id, title, year in read_rows(f"{directory}/movies.csv",
+                                           ("id", "title", "year")):
+        if movie_id in movies:
+            movies[movie_id]["title"] = title
+            movies[movie_id]["year"] = year
+
+    details_loaded = True
+
+
+def load_snapshot(directory, key):
+    """
+    Fills names, people, movies and graph from the snapshot for
+    `directory`. Returns False if there is no valid snapshot.
+    """
+    global graph, details_loaded, names, people, movies
+
+    loaded = snapshot.load(snapshot.default_path(directory), key)
+    if loaded is None:
+        return False
+    buffers, strings = loaded
+
+    try:
+        person_ids = strings["person_ids"].decode()
+        movie_ids = strings["movie_ids"].decode()
+    except DECODE_ERRORS:
+        return False
+    names = snapshot.NameTable(strings["name_keys"],
+                               buffers.pop("name_offsets"),
+                               buffers.pop("name_people"), person_ids)
+    graph = CSRGraph(person_ids, movie_ids, **buffers)
+    people = snapshot.Records(person_ids, graph.person_position,
+                              {"name": strings["names"],
+                               "birth": strings["births"]})
+    movies = snapshot.Records(movie_ids, graph.movie_position,
+                              {"title": strings["titles"],
+                               "year": strings["years"]})
+    details_loaded = True
+    return True
+
+
+def save_snapshot(directory, key):
+    """
+    Writes the loaded compact data as the snapshot for `directory`.
+    A snapshot that cannot be written is skipped with a warning.
+    """
+    load_details()
+
+    # People of each name as graph indices, names in sorted order
+    index = {person_id: i for i, person_id in enumerate(graph.person_ids)}
+    name_keys = sorted(names)
+    name_offsets = array(INDEX, [0])
+    name_people = array(INDEX)
+    for name in name_keys:
+        name_people.extend(sorted(index[person_id] for person_id in names[name]))
+        name_offsets.append(len(name_people))
+
+    strings = {
+        "person_ids": graph.person_ids,
+        "names": [person["name"] for person in people.values()],
+        "births": [person["birth"] for person in people.values()],
+        "movie_ids": graph.movie_ids,
+        "titles": [movie["title"] for movie in movies.values()],
+        "years": [movie["year"] for movie in movies.values()],
+        "name_keys": name_keys,
+    }
+    buffers = {
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people,
+        "person_order": graph.person_order,
+        "movie_order": graph.movie_order,
+        "name_offsets": name_offsets,
+        "name_people": name_people,
+    }
+    try:
+        snapshot.save(snapshot.default_path(directory), key, buffers, strings)
+    except OSError as e:
+        print(f"Could not write snapshot: {e}", file=sys.stderr)
+
+
+def use_landmarks(path=None, k=16):
+    """
+    Loads the landmark index for the loaded data from `path` (by default
+    next to the CSVs), building and saving it first if it is missing or
+    was built from different CSVs.
+    """
+    global landmarks
+
+    directory = loaded_with["directory"]
+    path = path or landmarks_path(directory)
+    key = snapshot.source_key(directory)
+    landmarks = LandmarkIndex.load(path, key, graph=graph)
+    if landmarks is None:
+        landmarks = LandmarkIndex.build(list(people), neighbors_for_person,
+                                        k=k, key=key, graph=graph)
+        try:
+            landmarks.save(path)
+        except OSError as e:
+            print(f"Could not write landmarks: {e}", file=sys.stderr)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the co-star graph as integer CSR arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="reuse a binary snapshot of the data "
+                             "(implies --compact)")
+    parser.add_argument("--minimal", action="store_true",
+                        help="load only what path search needs; read "
+                             "birth, title and year when first used")
+    parser.add_argument("--progress", action="store_true",
+                        help="report rows/sec on stderr while loading")
+    parser.add_argument("--costars", choices=("off", "eager", "lazy"),
+                        default="off",
+                        help="precompute a deduplicated co-star index")
+    parser.add_argument("--landmarks", nargs="?", const="", metavar="FILE",
+                        help="use (building if needed) a landmark distance "
+                             "index to bound and prune searches")
+    parser.add_argument("--cache-size", type=float, default=0, metavar="MB",
+                        help="cache paths and search trees in up to MB "
+                             "megabytes")
+    parser.add_argument("--profile", action="store_true",
+                        help="print load and search counters and timers "
+                             "on stderr")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="write the counters and timers, per query, "
+                             "as JSON")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer every 'source,target' line of FILE "
+                             "('-' for stdin) as JSON lines")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="answer batch queries in N worker processes")
+    args = parser.parse_args()
+
+    if args.profile or args.profile_json:
+        start_profile()
+    try:
+        run(args)
+    finally:
+        if profile is not None:
+            if args.profile:
+                print(profile.summary(), file=sys.stderr)
+            if args.profile_json:
+                profile.dump(args.profile_json)
+
+
+def run(args):
+    directory = args.directory
+
+    # Status goes to stderr in batch mode so stdout is pure JSON lines
+    status = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=status)
+    load_data(directory, compact=args.compact, use_snapshot=args.snapshot,
+              details=not args.minimal, progress=args.progress)
+    if args.costars != "off":
+        build_costar_index(lazy=args.costars == "lazy")
+    if args.landmarks is not None:
+        use_landmarks(args.landmarks or None)
+    if args.cache_size > 0:
+        enable_cache(int(args.cache_size * 2 ** 20))
+    print("Data loaded.", file=status)
+
+    if args.batch:
+        try:
+            if args.batch == "-":
+                run_batch(sys.stdin, sys.stdout, workers=args.workers)
+            else:
+                with open(args.batch, encoding="utf-8") as f:
+                    run_batch(f, sys.stdout, workers=args.workers)
+        except (OSError, ValueError) as e:
+            sys.exit(str(e))
+        return
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(name))
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(name))
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=args.bidirectional)
 
     if path is None:
         print("Not connected.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
+        load_details()
         path = [(None, source)] + path
         
         for i in range(degrees):
@@ -85,7 +394,85 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return self_path(source)
+    if profile is None:
+        return cached_path(source, target, bidirectional)
+    with profile.query(f"{source} -> {target}"):
+        return cached_path(source, target, bidirectional)
+
+
+def self_path(person_id):
+    """
+    The path from a person to themselves, as breadth-first search finds
+    it: one step through a movie they starred in (the smallest
+    movie_id, so every search mode agrees), or None if they have none.
+    """
+    if graph is not None:
+        p = graph.person_position(person_id)
+        movie_ids = [graph.movie_ids[m] for m in graph.movies_of(p)]
+    else:
+        movie_ids = people[person_id]["movies"]
+    if not movie_ids:
+        return None
+    return [(min(movie_ids), person_id)]
+
+
+def cached_path(source, target, bidirectional=False):
+    """
+    shortest_path through the result caches, when enabled.
+    """
+    if path_cache is None:
+        return find_path(source, target, bidirectional)
+
+    if (source, target) in path_cache:
+        path = path_cache.get((source, target))
+    elif (target, source) in path_cache:
+        path = reverse_path(path_cache.get((target, source)), target)
+    else:
+        path_cache.misses += 1
+        path = tree_path(source, target, bidirectional)
+        path_cache.put((source, target), path)
+    return None if path is None else list(path)
+
+
+def tree_path(source, target, bidirectional=False):
+    """
+    shortest_path through the search tree cache. Unidirectional
+    searches grow (or reuse) a cached breadth-first tree from source;
+    bidirectional ones only reuse a tree that is already cached.
+    """
+    if landmarks is not None and not landmarks.connected(source, target):
+        return None
+    if not bidirectional:
+        return path_from_tree(cached_tree(source, [target]), target)
+    if len(tree_cache):
+        entry = tree_cache.get(source)
+        if entry is not None and (entry[1] or target in entry[0]):
+            return path_from_tree(entry[0], target)
+    return find_path(source, target, bidirectional)
+
+
+def find_path(source, target, bidirectional=False):
+	"""
+	Uncached shortest_path.
+	"""
+	if landmarks is not None and not landmarks.connected(source, target):
+		return None
+	if bidirectional:
+		return bidirectional_path(source, target)
+	if landmarks is not None:
+		return landmark_path(source, target)
+	if graph is not None:
+		return graph.shortest_path(source, target, profile=profile)
+
 	frontier = QueueFrontier()  # frontier
 	start = Node(state=source, parent=None, action=None)  # first node
 	visited = set()  # set of visited
@@ -134,7 +521,400 @@ def shortest_path(source, target):
 				elif person_id not in visited:
                     # add next node to the frontier
 					frontier.add(Node(state=person_id, parent=node, action=movie_id))
-    
+					if profile is not None:
+						profile.peak("frontier", len(frontier))
+
+
+def reverse_path(path, source):
+    """
+    Turns the path from source to some target into the path from that
+    target back to source.
+    """
+    if path is None:
+        return None
+    people_on_path = [source] + [person_id for _, person_id in path]
+    return [(path[i][0], people_on_path[i]) for i in reversed(range(len(path)))]
+
+
+def enable_cache(max_bytes=64 * 2 ** 20):
+    """
+    Starts caching shortest_path results and per-source search trees
+    in memory bounded by roughly max_bytes: a quarter for paths, the
+    rest for trees.
+    """
+    global path_cache, tree_cache
+
+    path_cache = LRUCache(max_bytes // 4, _path_bytes)
+    tree_cache = LRUCache(max_bytes - max_bytes // 4, _tree_bytes)
+
+
+def disable_cache():
+    global path_cache, tree_cache
+    path_cache = tree_cache = None
+
+
+def cache_stats():
+    """
+    Returns counters of both caches, or None if caching is off.
+    """
+    if path_cache is None:
+        return None
+    return {"paths": path_cache.stats(), "trees": tree_cache.stats()}
+
+
+def _path_bytes(path):
+    # list header plus one (movie_id, person_id) tuple per step
+    return 64 if path is None else 64 + 72 * len(path)
+
+
+def _tree_bytes(entry):
+    # dict slots plus one (movie_id, person_id) tuple per person
+    tree, _ = entry
+    return sys.getsizeof(tree) + 64 * len(tree)
+
+
+def cached_tree(source, targets):
+    """
+    Returns a search tree from source reaching every one of `targets`,
+    reusing a cached one when it covers them.
+    """
+    if tree_cache is not None:
+        entry = tree_cache.get(source)
+        if entry is not None:
+            tree, complete = entry
+            if complete or all(target in tree for target in targets):
+                return tree
+
+    tree = search_tree(source, targets)
+    if tree_cache is not None:
+        # A search that missed some target ran out of people to reach
+        complete = not all(target in tree for target in targets)
+        tree_cache.put(source, (tree, complete))
+    return tree
+
+
+def landmark_path(source, target):
+    """
+    Breadth-first search that skips anyone who, by the landmark lower
+    bound, cannot lie on a path within the landmark upper bound.
+    """
+    bounds = landmarks.bounds(source, target)
+    if bounds is None:
+        return None
+    if source == target:
+        return []
+    _, upper = bounds
+
+    position = landmarks.position
+    t = position(target)
+    tree = {source: None}
+    queue = deque([(source, 0)])
+    while queue:
+        person, depth = queue.popleft()
+        for movie_id, person_id in neighbors_for_person(person):
+            if person_id in tree:
+                continue
+            tree[person_id] = (movie_id, person)
+            if person_id == target:
+                return path_from_tree(tree, target)
+            if upper is not None:
+                lower = landmarks.lower_bound(position(person_id), t)
+                if depth + 1 + lower > upper:
+                    continue
+            queue.append((person_id, depth + 1))
+        if profile is not None:
+            profile.peak("frontier", len(queue))
+    return None
+
+
+def bidirectional_path(source, target):
+    """
+    Same as shortest_path, but grows a breadth-first search from both
+    the source and the target, always expanding the smaller frontier
+    one full level at a time, and stitches the two halves together
+    where they meet.
+    """
+    if source == target:
+        return []
+
+    # Maps person_id to (movie_id, person_id) of the step towards each end
+    forward = {source: None}
+    backward = {target: None}
+
+    # Depth of every person reached from each end
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, seen, depth = forward_frontier, forward, forward_depth
+            other_depth = backward_depth
+        else:
+            frontier, seen, depth = backward_frontier, backward, backward_depth
+            other_depth = forward_depth
+
+        # Expand the whole level, remembering the best meeting point
+        best = None
+        next_frontier = []
+        for person in frontier:
+            level = depth[person] + 1
+            for movie_id, person_id in neighbors_for_person(person):
+                if person_id in seen:
+                    continue
+                seen[person_id] = (movie_id, person)
+                depth[person_id] = level
+                next_frontier.append(person_id)
+                if person_id in other_depth:
+                    length = level + other_depth[person_id]
+                    if best is None or length < best[0]:
+                        best = (length, person_id)
+
+        if profile is not None:
+            profile.peak("frontier", len(next_frontier))
+        if best is not None:
+            return _stitch(best[1], forward, backward)
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _stitch(meeting, forward, backward):
+    """
+    Joins the two halves of a bidirectional search at `meeting`
+    into a single source to target path.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie_id, parent = forward[person]
+        path.append((movie_id, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie_id, child = backward[person]
+        path.append((movie_id, child))
+        person = child
+
+    return path
+
+
+def search_tree(source, targets=None):
+    """
+    Breadth-first search from source. Returns a dict mapping every
+    reached person_id to the (movie_id, person_id) step back towards
+    source (None for source itself). When `targets` is given the search
+    stops as soon as all of them have been reached.
+    """
+    if graph is not None:
+        return graph.search_tree(source, targets, profile=profile)
+
+    tree = {source: None}
+    remaining = set(targets) - {source} if targets is not None else None
+    if remaining is not None and not remaining:
+        return tree
+
+    queue = deque([source])
+    while queue:
+        person = queue.popleft()
+        for movie_id, person_id in neighbors_for_person(person):
+            if person_id in tree:
+                continue
+            tree[person_id] = (movie_id, person)
+            queue.append(person_id)
+            if remaining is not None:
+                remaining.discard(person_id)
+                if not remaining:
+                    return tree
+        if profile is not None:
+            profile.peak("frontier", len(queue))
+    return tree
+
+
+def path_from_tree(tree, target):
+    """
+    Reads the (movie_id, person_id) path to target out of a tree built
+    by search_tree, or returns None if target was not reached.
+    """
+    if target not in tree:
+        return None
+    path = []
+    while tree[target] is not None:
+        movie_id, parent = tree[target]
+        path.append((movie_id, target))
+        target = parent
+    path.reverse()
+    return path
+
+
+def resolve_name(name):
+    """
+    Non-interactive person_id_for_name. Returns (person_id, error).
+    """
+    person_ids = names.get(name.lower(), set())
+    if len(person_ids) == 0:
+        return None, "person not found"
+    if len(person_ids) > 1:
+        return None, f"ambiguous name: {', '.join(sorted(person_ids))}"
+    return next(iter(person_ids)), None
+
+
+def read_pairs(lines):
+    """
+    Parses 'source,target' CSV lines into (line_number, source, target)
+    tuples, skipping blank lines.
+    """
+    pairs = []
+    for number, row in enumerate(csv.reader(lines), start=1):
+        if not row or not any(field.strip() for field in row):
+            continue
+        if len(row) != 2:
+            raise ValueError(f"line {number}: expected 'source,target'")
+        pairs.append((number, row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def group_pairs(pairs):
+    """
+    Resolves names and groups queries by source person_id. Returns
+    (groups, failures): groups maps source to a list of
+    (line, source_name, target_name, target_id) in input order, and
+    failures is a list of ready-made result dicts.
+    """
+    groups = {}
+    failures = []
+    for line, source_name, target_name in pairs:
+        source, error = resolve_name(source_name)
+        if error is None:
+            target, error = resolve_name(target_name)
+        if error is not None:
+            failures.append({"line": line, "source": source_name,
+                             "target": target_name, "error": error})
+            continue
+        groups.setdefault(source, []).append(
+            (line, source_name, target_name, target))
+    return groups, failures
+
+
+def answer_group(source, queries):
+    """
+    Answers every query of one source from a single search tree.
+    """
+    targets = [query[3] for query in queries]
+    if profile is None:
+        tree = cached_tree(source, targets)
+    else:
+        with profile.query(f"{source} -> {len(targets)} targets"):
+            tree = cached_tree(source, targets)
+    results = []
+    for line, source_name, target_name, target in queries:
+        if target == source:
+            path = self_path(source)
+        else:
+            path = path_from_tree(tree, target)
+        results.append({
+            "line": line,
+            "source": source_name,
+            "target": target_name,
+            "degrees": None if path is None else len(path),
+            "path": path,
+        })
+    return results
+
+
+def answer_group_task(group):
+    """
+    Pool task wrapper around answer_group.
+    """
+    return answer_group(*group)
+
+
+def init_worker(options):
+    """
+    Loads the data in a spawned worker, which does not inherit it.
+    """
+    load_data(**options)
+
+
+def worker_pool(workers):
+    """
+    Returns a process pool whose workers can see the loaded data.
+
+    With fork the workers share the parent's pages copy-on-write, so
+    nothing is pickled per task except the query group itself; the CSR
+    buffers in particular are never written and stay shared. Where fork
+    is unavailable each worker reloads the data, which with a snapshot
+    means mapping the same file pages.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork").Pool(workers)
+    return multiprocessing.get_context("spawn").Pool(
+        workers, initializer=init_worker, initargs=(loaded_with,))
+
+
+def run_batch(lines, out, workers=1):
+    """
+    Answers every 'source,target' line of `lines`, writing one JSON
+    object per query to `out` as soon as its source group is done, and
+    reports throughput on stderr. With workers > 1 the source groups
+    are answered in a process pool and arrive in completion order.
+    Returns (queries, seconds).
+    """
+    start = time.perf_counter()
+    groups, failures = group_pairs(read_pairs(lines))
+
+    count = 0
+    for result in failures:
+        out.write(json.dumps(result) + "\n")
+        count += 1
+
+    if workers > 1 and len(groups) > 1:
+        pool = worker_pool(workers)
+        chunksize = max(1, len(groups) // (workers * 8))
+        answered = pool.imap_unordered(answer_group_task, groups.items(),
+                                       chunksize=chunksize)
+    else:
+        pool = None
+        answered = (answer_group(*group) for group in groups.items())
+
+    try:
+        for results in answered:
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+                count += 1
+            out.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"{count} queries in {elapsed:.3f}s ({rate:.1f} queries/sec), "
+          f"{len(groups)} search trees, {workers} worker(s)", file=sys.stderr)
+    if workers <= 1:
+        print_cache_stats()
+    return count, elapsed
+
+
+def print_cache_stats():
+    stats = cache_stats()
+    if stats is None:
+        return
+    for name, counters in stats.items():
+        print(f"{name} cache: {counters['hits']} hits, {counters['misses']} "
+              f"misses, {counters['evictions']} evictions, "
+              f"{counters['entries']} entries, {counters['bytes']:,} of "
+              f"{counters['max_bytes']:,} bytes", file=sys.stderr)
+
 
 def person_id_for_name(name):
     """
@@ -145,6 +925,7 @@ def person_id_for_name(name):
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        load_details()
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -162,11 +943,71 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def people_for_prefix(prefix, limit=10):
+    """
+    Returns up to `limit` (name, person_id) pairs for people whose name
+    starts with prefix, ignoring case.
+    """
+    matches = []
+    for key in name_index.prefix(prefix, limit):
+        for person_id in sorted(names[key]):
+            matches.append((people[person_id]["name"], person_id))
+    return matches[:limit]
+
+
+def people_like(name, max_distance=2, limit=10):
+    """
+    Returns up to `limit` (name, person_id) pairs for people whose name
+    is within max_distance edits of name, ignoring case, closest first.
+    """
+    matches = []
+    for _, key in name_index.fuzzy(name, max_distance, limit):
+        for person_id in sorted(names[key]):
+            matches.append((people[person_id]["name"], person_id))
+    return matches[:limit]
+
+
+def not_found_message(name):
+    """
+    'Person not found.', with the closest names to the one looked up.
+    """
+    if name_index is None:
+        return "Person not found."
+    suggestions = people_like(name, limit=5)
+    if not suggestions:
+        suggestions = people_for_prefix(name, limit=5)
+    if not suggestions:
+        return "Person not found."
+    listed = ", ".join(sorted({name for name, _ in suggestions}))
+    return f"Person not found. Did you mean: {listed}?"
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if profile is None:
+        return _neighbors(person_id)
+
+    start = time.perf_counter()
+    neighbors = _neighbors(person_id)
+    profile.add_time("neighbors_for_person", time.perf_counter() - start)
+    profile.count("nodes_expanded")
+    profile.count("neighbor_tuples", len(neighbors))
+    return neighbors
+
+
+def _neighbors(person_id):
+    if costars is not None:
+        neighbors = costars.get(person_id)
+        if neighbors is None:
+            neighbors = costars[person_id] = costars_for_person(person_id)
+        return neighbors
+
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -175,5 +1016,40 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def costars_for_person(person_id):
+    """
+    Returns a tuple of (movie_id, person_id) pairs with exactly one
+    witness movie for every person who starred with a given person.
+    """
+    if graph is not None:
+        pairs = graph.neighbors_for_person(person_id)
+    else:
+        pairs = ((movie_id, star) for movie_id in people[person_id]["movies"]
+                 for star in movies[movie_id]["stars"])
+    witnesses = {}
+    for movie_id, star in pairs:
+        witnesses.setdefault(star, movie_id)
+    return tuple((movie_id, star) for star, movie_id in witnesses.items())
+
+
+def build_costar_index(lazy=False):
+    """
+    Switches neighbors_for_person over to a precomputed co-star index.
+    With lazy=True people are only indexed the first time they are
+    expanded; otherwise everyone is indexed up front.
+    """
+    global costars
+
+    costars = {}
+    if not lazy:
+        for person_id in people:
+            costars[person_id] = costars_for_person(person_id)
+
+
+def drop_costar_index():
+    global costars
+    costars = None
+
+
 if __name__ == "__main__":
     main()
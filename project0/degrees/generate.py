@@ -0,0 +1,124 @@
+"""
+Writes a synthetic people.csv, movies.csv and stars.csv in the format
+degrees.py reads, at any scale.
+
+Cast sizes follow a discrete power law, and people are picked for each
+cast slot with Zipf-like popularity, so a few people star in very many
+movies and most in one or two, as in the IMDb data.
+
+Usage: python generate.py directory [--stars N] [--seed S]
+"""
+
+import argparse
+import csv
+import os
+import random
+from itertools import accumulate
+
+FIRST = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+         "Linda", "William", "Elizabeth", "David", "Barbara", "Richard",
+         "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+         "Chris", "Nancy", "Daniel", "Lisa", "Matthew", "Betty", "Anthony",
+         "Margaret", "Mark", "Sandra", "Emma", "Kevin", "Tom", "Gary", "Sally"]
+LAST = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+        "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+        "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+        "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark",
+        "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King",
+        "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores", "Green"]
+WORDS = ["Night", "Day", "Return", "Last", "First", "City", "Love", "War",
+         "Dark", "Star", "Road", "House", "River", "King", "Queen", "Ghost",
+         "Secret", "Summer", "Winter", "Game", "Heart", "Fire", "Ice", "Time"]
+
+# Cast sizes: P(size = s) proportional to s ** -CAST_EXPONENT
+CAST_EXPONENT = 1.8
+MAX_CAST = 200
+
+# Popularity of the person ranked r is proportional to r ** -POPULARITY
+POPULARITY = 0.6
+
+# Average movies per person, which fixes the number of people
+MOVIES_PER_PERSON = 2.5
+
+
+def cast_sizes(rng, stars):
+    """
+    Draws power-law cast sizes until they add up to `stars`.
+    """
+    sizes = list(range(1, MAX_CAST + 1))
+    weights = list(accumulate(size ** -CAST_EXPONENT for size in sizes))
+    casts = []
+    total = 0
+    while total < stars:
+        size = min(rng.choices(sizes, cum_weights=weights)[0], stars - total)
+        casts.append(size)
+        total += size
+    return casts
+
+
+def generate(directory, stars, seed=0):
+    """
+    Writes the three CSVs to directory. Returns (people, movies, stars).
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    casts = cast_sizes(rng, stars)
+    person_count = max(max(casts), int(stars / MOVIES_PER_PERSON))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(person_count):
+            name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+            birth = rng.randint(1920, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([person + 1, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(len(casts)):
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            writer.writerow([movie + 1, f"{title} {movie + 1}",
+                             rng.randint(1920, 2024)])
+
+    # Person ids are shuffled so popularity does not follow id order
+    ranked = list(range(1, person_count + 1))
+    rng.shuffle(ranked)
+    popularity = list(accumulate(
+        (rank + 1) ** -POPULARITY for rank in range(person_count)))
+
+    written = 0
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie, size in enumerate(casts, start=1):
+            cast = set()
+            while len(cast) < size:
+                picks = rng.choices(ranked, cum_weights=popularity,
+                                    k=size - len(cast))
+                cast.update(picks)
+            writer.writerows((person, movie) for person in cast)
+            written += size
+
+    return person_count, len(casts), written
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--stars", type=int, default=100_000,
+                        help="rows of stars.csv to write")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    people, movies, stars = generate(args.directory, args.stars, args.seed)
+    print(f"Wrote {people} people, {movies} movies and {stars} stars "
+          f"to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Low-allocation CSV reading for the degrees loaders.
+
+Rows come from csv.reader as lists and only the requested columns are
+picked out positionally, so no dict is built per row. ID columns can be
+interned so that the many repeats of a person or movie ID in stars.csv
+all share one string object.
+"""
+
+import csv
+import sys
+import time
+from operator import itemgetter
+
+# Rows between two progress updates
+PROGRESS_EVERY = 100_000
+
+
+class Progress():
+    """
+    Prints a running rows and rows/sec count for one file on stderr.
+    """
+
+    def __init__(self, label, stream=sys.stderr, every=PROGRESS_EVERY):
+        self.label = label
+        self.stream = stream
+        self.every = every
+        self.rows = 0
+        self.start = time.perf_counter()
+
+    def _print(self, end):
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed > 0 else 0
+        print(f"\r{self.label}: {self.rows:,} rows ({rate:,.0f} rows/sec)",
+              end=end, file=self.stream, flush=True)
+
+    def update(self, rows):
+        self.rows = rows
+        if rows % self.every == 0:
+            self._print("")
+
+    def done(self):
+        self._print("\n")
+
+
+def read_rows(filename, columns, intern=(), progress=False):
+    """
+    Yields a tuple of the named `columns` for every row of `filename`.
+    Values of the columns listed in `intern` are passed through
+    sys.intern. With progress=True a rows/sec counter is kept on stderr.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        try:
+            positions = [header.index(column) for column in columns]
+        except ValueError:
+            raise ValueError(f"{filename} needs columns {', '.join(columns)}")
+        if len(positions) == 1:
+            position = positions[0]
+            pick = lambda row: (row[position],)
+        else:
+            pick = itemgetter(*positions)
+        # csv.reader hands out a new list per row, so the interned
+        # strings go straight into it and the tuple is built once
+        interned = [position for position, column in zip(positions, columns)
+                    if column in intern]
+        counter = Progress(filename) if progress else None
+
+        for number, row in enumerate(reader, start=1):
+            for position in interned:
+                row[position] = sys.intern(row[position])
+            yield pick(row)
+            if counter is not None:
+                counter.update(number)
+
+        if counter is not None:
+            counter.done()
@@ -0,0 +1,108 @@
+"""
+Opt-in counters and timers for loading and searching.
+
+Code being measured calls count, add_time, timer and peak on a Profile;
+wrapping a unit of work in Profile.query records what that unit alone
+contributed, so per-query numbers can be compared across runs.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profile():
+    def __init__(self):
+        self.counters = {}
+        # name -> [calls, seconds]
+        self.timers = {}
+        self.peaks = {}
+        self.queries = []
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += 1
+        timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def peak(self, name, value):
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    @contextmanager
+    def query(self, label):
+        """
+        Records the counters, timers and peaks of one query.
+        """
+        counters = dict(self.counters)
+        timers = {name: list(timer) for name, timer in self.timers.items()}
+        overall_peaks = self.peaks
+        self.peaks = {}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peaks, self.peaks = self.peaks, overall_peaks
+            self.queries.append({
+                "query": label,
+                "seconds": seconds,
+                "counters": {name: value - counters.get(name, 0)
+                             for name, value in self.counters.items()
+                             if value != counters.get(name, 0)},
+                "timers": {name: timer[1] - timers.get(name, [0, 0.0])[1]
+                           for name, timer in self.timers.items()
+                           if timer[0] != timers.get(name, [0, 0.0])[0]},
+                "peaks": peaks,
+            })
+            for name, value in peaks.items():
+                self.peak(name, value)
+            self.add_time("query", seconds)
+
+    def as_dict(self):
+        return {
+            "counters": self.counters,
+            "timers": {name: {"calls": calls, "seconds": seconds}
+                       for name, (calls, seconds) in self.timers.items()},
+            "peaks": self.peaks,
+            "queries": self.queries,
+        }
+
+    def dump(self, filename):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self):
+        lines = []
+        if self.timers:
+            lines.append(f"{'timer':<28}{'calls':>10}{'seconds':>12}"
+                         f"{'per call':>14}")
+            for name, (calls, seconds) in sorted(self.timers.items()):
+                lines.append(f"{name:<28}{calls:>10}{seconds:>12.4f}"
+                             f"{seconds / calls * 1e6:>12.1f}us")
+        if self.counters:
+            lines.append(f"{'counter':<28}{'total':>10}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<28}{value:>10}")
+        if self.peaks:
+            lines.append(f"{'peak':<28}{'max':>10}")
+            for name, value in sorted(self.peaks.items()):
+                lines.append(f"{name:<28}{value:>10}")
+        if self.queries:
+            slowest = max(self.queries, key=lambda query: query["seconds"])
+            lines.append(f"{len(self.queries)} queries, slowest "
+                         f"{slowest['seconds'] * 1000:.2f} ms: "
+                         f"{slowest['query']}")
+        return "\n".join(lines)
@@ -0,0 +1,220 @@
+"""
+Landmark distance oracle for the co-star graph.
+
+Breadth-first distances from K high-degree people ("landmarks") give
+bounds on the degrees of separation between any two people s and t:
+
+    max over landmarks |d(l, s) - d(l, t)|  <=  d(s, t)  <=  min d(l, s) + d(l, t)
+
+Connected-component labels answer "not connected" with two lookups.
+
+Usage: python landmarks.py directory [output] [--k K] [--compact]
+"""
+
+import argparse
+import os
+from array import array
+from collections import deque
+
+import binfile
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 2
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+FILENAME = ".degrees.landmarks"
+
+
+class LandmarkIndex():
+    def __init__(self, person_ids, components, landmarks, distances, key=None,
+                 position=None):
+        self.person_ids = person_ids
+        # position(person_id) is the index of a person in person_ids
+        if position is None:
+            position = {person_id: i
+                        for i, person_id in enumerate(person_ids)}.__getitem__
+        self.position = position
+        self.components = components
+        self.landmarks = landmarks
+        self.distances = distances
+        self.key = key
+
+    @classmethod
+    def build(cls, person_ids, neighbors, k=16, key=None, graph=None):
+        """
+        Builds the index. `neighbors` maps a person_id to an iterable of
+        (movie_id, person_id) pairs, like degrees.neighbors_for_person.
+        See load for `graph`.
+        """
+        index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+        # Label connected components
+        components = array("i", [-1]) * len(person_ids)
+        label = 0
+        for start in range(len(person_ids)):
+            if components[start] != -1:
+                continue
+            components[start] = label
+            queue = deque([start])
+            while queue:
+                p = queue.popleft()
+                for _, person_id in neighbors(person_ids[p]):
+                    q = index[person_id]
+                    if components[q] == -1:
+                        components[q] = label
+                        queue.append(q)
+            label += 1
+
+        # Highest-degree people become landmarks
+        degree = sorted(range(len(person_ids)),
+                        key=lambda p: len(neighbors(person_ids[p])),
+                        reverse=True)
+        chosen = degree[:k]
+
+        distances = []
+        for landmark in chosen:
+            distance = array("B", [UNREACHABLE]) * len(person_ids)
+            distance[landmark] = 0
+            queue = deque([landmark])
+            while queue:
+                p = queue.popleft()
+                next_distance = min(distance[p] + 1, UNREACHABLE - 1)
+                for _, person_id in neighbors(person_ids[p]):
+                    q = index[person_id]
+                    if distance[q] == UNREACHABLE:
+                        distance[q] = next_distance
+                        queue.append(q)
+            distances.append(distance)
+
+        person_ids = list(person_ids)
+        return cls(person_ids, components, [person_ids[p] for p in chosen],
+                   distances, key, _graph_position(person_ids, graph))
+
+    def connected(self, source, target):
+        return (self.components[self.position(source)]
+                == self.components[self.position(target)])
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation, or
+        None if the two people are not connected. upper is None when no
+        landmark shares their component.
+        """
+        if not self.connected(source, target):
+            return None
+        s = self.position(source)
+        t = self.position(target)
+        if s == t:
+            return 0, 0
+
+        lower = 0
+        upper = None
+        for distance in self.distances:
+            ds = distance[s]
+            dt = distance[t]
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                continue
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def lower_bound(self, p, t):
+        """
+        Lower bound on the distance between two person indices.
+        """
+        lower = 0
+        for distance in self.distances:
+            dp = distance[p]
+            dt = distance[t]
+            if dp != UNREACHABLE and dt != UNREACHABLE and abs(dp - dt) > lower:
+                lower = abs(dp - dt)
+        return lower
+
+    def save(self, path):
+        ids = "\0".join(self.person_ids).encode("utf-8")
+        padding = b"\0" * (binfile.padded(len(ids)) - len(ids))
+        header = {
+            "key": self.key,
+            "landmarks": self.landmarks,
+            "people": len(self.person_ids),
+            "ids": len(ids),
+        }
+        binfile.save(path, MAGIC, VERSION, header,
+                     [ids, padding, self.components, *self.distances])
+
+    @classmethod
+    def load(cls, path, key=None, graph=None):
+        """
+        Reads an index written by save. Returns None if the file is
+        missing, damaged, of another version, or was built for another
+        `key`. When `graph` is a CSRGraph over the same people in the
+        same order, people are found with its person_position instead
+        of a dict built over all of them.
+        """
+        loaded = binfile.load(path, MAGIC, VERSION)
+        if loaded is None:
+            return None
+        header, body = loaded
+
+        try:
+            if key is not None and header["key"] != key:
+                return None
+            count = header["people"]
+            offset = binfile.padded(header["ids"])
+            ids = str(body[:header["ids"]], "utf-8")
+            person_ids = ids.split("\0") if count else []
+
+            size = count * array("i").itemsize
+            components = body[offset:offset + size].cast("i")
+            offset += size
+            distances = []
+            for _ in header["landmarks"]:
+                distances.append(body[offset:offset + count])
+                offset += count
+            if len(person_ids) != count or offset != len(body):
+                return None
+        except binfile.DECODE_ERRORS:
+            return None
+
+        return cls(person_ids, components, header["landmarks"], distances,
+                   header["key"], _graph_position(person_ids, graph))
+
+
+def _graph_position(person_ids, graph):
+    if graph is None or graph.person_ids != person_ids:
+        return None
+    return graph.person_position
+
+
+def default_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def main():
+    import degrees
+    import snapshot
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--k", type=int, default=16,
+                        help="number of landmarks")
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=args.compact, details=False)
+    index = LandmarkIndex.build(list(degrees.people),
+                                degrees.neighbors_for_person, k=args.k,
+                                key=snapshot.source_key(args.directory))
+    output = args.output or default_path(args.directory)
+    index.save(output)
+    print(f"{len(index.landmarks)} landmarks, "
+          f"{max(index.components, default=-1) + 1} components, "
+          f"written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Load generator for server.py.
+
+Opens `--concurrency` keep-alive connections and sends /path requests
+for random pairs of names (or the 'source,target' lines of --pairs)
+until `--requests` have completed, then reports throughput and latency
+percentiles.
+
+Usage: python loadgen.py (directory | --pairs FILE) [--port P | --unix PATH]
+                         [--requests R] [--concurrency C]
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import time
+from urllib.parse import urlencode
+
+from ingest import read_rows
+
+
+def random_pairs(directory, count, seed):
+    """
+    Pairs of names that are unique in the dataset, so none is ambiguous.
+    """
+    seen = {}
+    for (name,) in read_rows(f"{directory}/people.csv", ("name",)):
+        seen[name] = seen.get(name, 0) + 1
+    unique = sorted(name for name, times in seen.items() if times == 1)
+    rng = random.Random(seed)
+    return [(rng.choice(unique), rng.choice(unique)) for _ in range(count)]
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def client(args, pairs, latencies, statuses):
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while pairs:
+            source, target = pairs.pop()
+            query = urlencode({"source": source, "target": target})
+            start = time.perf_counter()
+            writer.write(f"GET /path?{query} HTTP/1.1\r\n"
+                         f"Host: {args.host}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(args, pairs):
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, pairs, latencies, statuses)
+                           for _ in range(args.concurrency)))
+    return time.perf_counter() - start, sorted(latencies), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?",
+                        help="dataset to draw names from (not needed "
+                             "with --pairs)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pairs", metavar="FILE",
+                        help="'source,target' CSV lines to send in turn")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.pairs:
+        try:
+            with open(args.pairs, encoding="utf-8") as f:
+                lines = [tuple(row) for row in csv.reader(f) if len(row) == 2]
+        except OSError as e:
+            parser.error(str(e))
+        if not lines:
+            parser.error(f"no 'source,target' lines in {args.pairs}")
+        pairs = [lines[i % len(lines)] for i in range(args.requests)]
+    elif args.directory is None:
+        parser.error("a directory or --pairs is required")
+    else:
+        pairs = random_pairs(args.directory, args.requests, args.seed)
+
+    elapsed, latencies, statuses = asyncio.run(run(args, pairs))
+
+    print(f"{len(latencies)} requests in {elapsed:.3f}s "
+          f"({len(latencies) / elapsed:.1f} requests/sec), "
+          f"concurrency {args.concurrency}")
+    print("status: " + ", ".join(f"{status} x{count}"
+                                 for status, count in sorted(statuses.items())))
+    for label, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99)):
+        print(f"{label}: {percentile(latencies, fraction) * 1000:.2f} ms")
+    if latencies:
+        print(f"max: {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
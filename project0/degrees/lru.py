@@ -0,0 +1,71 @@
+"""
+Size-bounded least-recently-used cache with hit/miss/eviction counters.
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache():
+    """
+    Maps keys to values, evicting the least recently used entries once
+    the estimated size of everything held goes over max_bytes.
+    `size` estimates the bytes of one value.
+    """
+
+    def __init__(self, max_bytes, size):
+        self.max_bytes = max_bytes
+        self.size = size
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """
+        Returns the value for key, marking it most recently used, and
+        counts a hit or a miss.
+        """
+        try:
+            value, _ = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Stores value under key. A value bigger than the whole cache is
+        not stored.
+        """
+        size = self.size(value)
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
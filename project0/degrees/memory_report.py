@@ -0,0 +1,72 @@
+"""
+Compares the memory taken by the dict-of-sets and the compact CSR
+representations of a dataset. Each representation is loaded in a fresh
+interpreter so the numbers do not bleed into each other.
+
+Usage: python memory_report.py [directory]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import degrees
+
+
+def resident_bytes():
+    """
+    Current resident set size of this process, or None off Linux.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(directory, compact):
+    rss_before = resident_bytes()
+    tracemalloc.start()
+    degrees.load_data(directory, compact=compact)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resident_bytes()
+
+    return {
+        "traced": traced,
+        "resident": None if rss_before is None else rss_after - rss_before,
+    }
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(measure(sys.argv[2], sys.argv[3] == "compact")))
+        return
+
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python memory_report.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    results = {}
+    for mode in ("dict", "compact"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", directory, mode],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = json.loads(output)
+
+    print(f"{'representation':<16}{'traced MiB':>12}{'resident MiB':>14}")
+    for mode, result in results.items():
+        resident = result["resident"]
+        resident = "n/a" if resident is None else f"{resident / 2 ** 20:.1f}"
+        print(f"{mode:<16}{result['traced'] / 2 ** 20:>12.1f}{resident:>14}")
+
+    ratio = results["dict"]["traced"] / max(1, results["compact"]["traced"])
+    print(f"compact uses {ratio:.1f}x less traced memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Prefix and fuzzy lookup over the lowercase names of degrees.names.
+
+Prefix completion is a binary search in a sorted list of the names.
+Fuzzy lookup finds names within a bounded edit distance through an
+inverted index from character trigrams to names: an edit touches at
+most three trigrams, so a match within distance d of a query with n
+trigrams shares at least n - 3d of them, and by pigeonhole must appear
+in one of the d * 3 + 1 rarest query trigram lists. Only those lists
+are read before verifying candidates with a banded edit distance.
+Queries shorter than that many trigrams only find names sharing at
+least one trigram with them.
+"""
+
+from array import array
+from bisect import bisect_left
+
+
+class NameIndex():
+    def __init__(self, names, keys=None):
+        self.names = names
+        self.keys = sorted(names) if keys is None else keys
+        self.postings = None
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with prefix, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(matches) < limit:
+            if not self.keys[i].startswith(prefix):
+                break
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (distance, name) pairs for names within
+        max_distance edits of name, closest first.
+        """
+        query = name.lower()
+        self.build_postings()
+
+        grams = sorted(set(trigrams(query)),
+                       key=lambda gram: len(self.postings.get(gram, ())))
+        scanned = min(len(grams), 3 * max_distance + 1)
+
+        candidates = set()
+        for gram in grams[:scanned]:
+            candidates.update(self.postings.get(gram, ()))
+
+        matches = []
+        for i in candidates:
+            key = self.keys[i]
+            if abs(len(key) - len(query)) > max_distance:
+                continue
+            distance = edit_distance(query, key, max_distance)
+            if distance is not None:
+                matches.append((distance, key))
+        matches.sort()
+        return matches[:limit]
+
+    def build_postings(self):
+        """
+        Builds the trigram postings fuzzy searches, once.
+        """
+        if self.postings is not None:
+            return
+        postings = {}
+        for i, key in enumerate(self.keys):
+            for gram in set(trigrams(key)):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("i")
+                posting.append(i)
+        self.postings = postings
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, bound):
+    """
+    Levenshtein distance between a and b, or None if it exceeds bound.
+    Only the diagonal band of width 2 * bound + 1 is computed.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+    infinity = bound + 1
+    previous = [j if j <= bound else infinity for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [infinity] * (len(b) + 1)
+        if i <= bound:
+            current[0] = i
+        low = max(1, i - bound)
+        high = min(len(b), i + bound)
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + cost, infinity)
+        if min(current) > bound:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= bound else None
@@ -0,0 +1,287 @@
+"""
+Long-running degrees query server.
+
+Loads the data once, then answers HTTP/1.1 GET requests over TCP or a
+Unix socket:
+
+    /path?source=NAME&target=NAME[&bidirectional=1]
+    /names?prefix=TEXT[&limit=N]
+    /names?like=TEXT[&distance=D][&limit=N]
+    /stats
+
+Name lookups are answered on the event loop; searches run in a process
+pool whose workers inherit the loaded graph (or reload it where fork is
+not available), so a slow search never blocks other requests. The
+one-off work of reading birth, title and year (with --minimal) and of
+building the fuzzy name index runs on a thread the first time it is
+needed, which requests then wait for without holding up the loop.
+
+Usage: python server.py [directory] [--port P | --unix PATH] [--workers N]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": message, **extra}
+
+
+class Server():
+    def __init__(self, pool):
+        self.pool = pool
+        self.started = time.time()
+        self.requests = 0
+        self.searches = 0
+        self.pending = {}
+
+    async def once(self, function):
+        """
+        Runs function on a thread the first time it is awaited; later
+        callers wait for that same run.
+        """
+        if function not in self.pending:
+            loop = asyncio.get_running_loop()
+            self.pending[function] = loop.run_in_executor(None, function)
+        await self.pending[function]
+
+    async def details(self):
+        if not degrees.details_loaded:
+            await self.once(degrees.load_details)
+
+    async def fuzzy_names(self):
+        if degrees.name_index.postings is None:
+            await self.once(degrees.name_index.build_postings)
+
+    async def handle(self, reader, writer):
+        """
+        Serves requests on one connection until the client closes it or
+        asks to.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                status, body = await self.respond(request_line)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                payload = json.dumps(body).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, request_line):
+        self.requests += 1
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return 400, {"error": "malformed request line"}
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        routes = {"/path": self.path, "/names": self.names, "/stats": self.stats}
+        route = routes.get(url.path)
+        if route is None:
+            return 404, {"error": f"no route {url.path}"}
+        try:
+            return 200, await route(query)
+        except HTTPError as e:
+            return e.status, e.body
+        except Exception as e:
+            return 500, {"error": repr(e)}
+
+    async def path(self, query):
+        source = await self.resolve(query, "source")
+        target = await self.resolve(query, "target")
+        bidirectional = query.get("bidirectional", "0") not in ("0", "")
+
+        self.searches += 1
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(
+            self.pool, degrees.shortest_path, source, target, bidirectional)
+
+        if path is None:
+            return {"source": source, "target": target, "degrees": None,
+                    "path": None}
+        await self.details()
+        return {
+            "source": source,
+            "target": target,
+            "degrees": len(path),
+            "path": [{"movie_id": movie_id,
+                      "title": degrees.movies[movie_id]["title"],
+                      "person_id": person_id,
+                      "name": degrees.people[person_id]["name"]}
+                     for movie_id, person_id in path],
+        }
+
+    async def names(self, query):
+        limit = integer(query, "limit", 10)
+        if "prefix" in query:
+            matches = degrees.people_for_prefix(query["prefix"], limit)
+        elif "like" in query:
+            await self.fuzzy_names()
+            matches = degrees.people_like(
+                query["like"], integer(query, "distance", 2), limit)
+        else:
+            raise HTTPError(400, "pass prefix= or like=")
+        return {"matches": [{"name": name, "person_id": person_id}
+                            for name, person_id in matches]}
+
+    async def resolve(self, query, field):
+        """
+        Person ID for query[field], which may be a name or an ID.
+        """
+        value = query.get(field)
+        if not value:
+            raise HTTPError(400, f"missing {field}")
+        if value in degrees.people:
+            return value
+        person_id, error = degrees.resolve_name(value)
+        if error is not None:
+            # everyone of that name if it is ambiguous, else the closest names
+            person_ids = sorted(degrees.names.get(value.lower(), ()))
+            if not person_ids:
+                await self.fuzzy_names()
+                person_ids = [person_id for _, person_id
+                              in degrees.people_like(value, limit=5)]
+            await self.details()
+            raise HTTPError(404, f"{field}: {error}",
+                            suggestions=[describe(person_id)
+                                         for person_id in person_ids])
+        return person_id
+
+    async def stats(self, query):
+        return {
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "searches": self.searches,
+            "people": len(degrees.people),
+            "movies": len(degrees.movies),
+        }
+
+
+def describe(person_id):
+    """
+    Name, ID and birth year of a person, enough to tell namesakes apart.
+    """
+    person = degrees.people[person_id]
+    return {"name": person["name"], "person_id": person_id,
+            "birth": person.get("birth")}
+
+
+def integer(query, field, default):
+    try:
+        return int(query.get(field, default))
+    except ValueError:
+        raise HTTPError(400, f"{field} must be an integer")
+
+
+def make_pool(workers, cache_bytes):
+    """
+    Process pool for searches. Forked workers inherit the loaded data;
+    elsewhere each worker loads it again.
+
+    A fork pool starts its workers on the first submit, which is done
+    here, while this is the only thread: forking later, with the event
+    loop's executor threads running, could deadlock the children.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("fork"),
+            initializer=init_search_worker, initargs=(None, cache_bytes))
+        pool.submit(int).result()
+        return pool
+    return ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_search_worker,
+        initargs=(degrees.loaded_with, cache_bytes))
+
+
+def init_search_worker(options, cache_bytes):
+    if options is not None:
+        degrees.load_data(**options)
+    if cache_bytes:
+        degrees.enable_cache(cache_bytes)
+
+
+async def serve(args, pool):
+    server = Server(pool)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle, args.unix)
+        where = args.unix
+    else:
+        listener = await asyncio.start_server(server.handle, args.host,
+                                              args.port)
+        where = f"http://{args.host}:{args.port}"
+    print(f"Serving on {where}", file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--unix", metavar="PATH",
+                        help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--snapshot", action="store_true")
+    parser.add_argument("--minimal", action="store_true")
+    parser.add_argument("--cache-size", type=float, default=0, metavar="MB",
+                        help="per-worker path and tree cache size")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact,
+                      use_snapshot=args.snapshot, details=not args.minimal)
+    print("Data loaded.", file=sys.stderr)
+
+    pool = make_pool(args.workers, int(args.cache_size * 2 ** 20))
+    try:
+        asyncio.run(serve(args, pool))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Versioned binary snapshot of a loaded dataset.
+
+The file is a binfile (magic, format version, JSON header) whose body
+is 8-byte aligned sections. The header records the size and mtime of
+every CSV the snapshot was built from, so a snapshot is ignored as soon
+as any of them changes. The CSR
+index buffers are memory-mapped and used in place. A string table is
+an index buffer of start offsets followed by the NUL-separated UTF-8
+strings, so one string can be decoded without touching the others.
+
+Loading builds no per-entry structures: IDs are found by binary search
+in sorted orders stored with the graph, and names, births, titles and
+years are decoded from the mapping only when they are looked up.
+"""
+
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from itertools import accumulate
+from operator import add
+
+import binfile
+from csr import INDEX
+
+INDEX_SIZE = array(INDEX).itemsize
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 3
+
+FILENAME = ".degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+BUFFERS = ("person_offsets", "person_movies", "movie_offsets", "movie_people",
+           "person_order", "movie_order", "name_offsets", "name_people")
+STRINGS = ("person_ids", "names", "births", "movie_ids", "titles", "years",
+           "name_keys")
+
+
+class StringTable(Sequence):
+    """
+    Strings of a snapshot section, each decoded when it is read.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.data[self.offsets[i]:self.offsets[i + 1] - 1], "utf-8")
+
+    def __iter__(self):
+        return iter(self.decode())
+
+    def decode(self):
+        """
+        Returns every string as a list, decoding the section in one go.
+        """
+        if not len(self):
+            return []
+        return str(self.data[:-1], "utf-8").split("\0")
+
+
+class Records(Mapping):
+    """
+    Read-only {id: {field: value}} over the string tables in `fields`,
+    row i belonging to ids[i]. `position` returns the row of an id or
+    raises KeyError.
+    """
+
+    def __init__(self, ids, position, fields):
+        self.ids = ids
+        self.position = position
+        self.fields = fields
+
+    def __getitem__(self, id):
+        i = self.position(id)
+        return {field: table[i] for field, table in self.fields.items()}
+
+    def __contains__(self, id):
+        try:
+            self.position(id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class NameTable(Mapping):
+    """
+    Read-only {lowercase name: set of person_ids}. `keys` holds the
+    names in sorted order and the rows of the people with name keys[k]
+    are people[offsets[k]:offsets[k + 1]].
+    """
+
+    def __init__(self, keys, offsets, people, person_ids):
+        self.sorted_keys = keys
+        self.offsets = offsets
+        self.people = people
+        self.person_ids = person_ids
+
+    def __getitem__(self, name):
+        k = bisect_left(self.sorted_keys, name)
+        if k == len(self.sorted_keys) or self.sorted_keys[k] != name:
+            raise KeyError(name)
+        person_ids = self.person_ids
+        return {person_ids[p]
+                for p in self.people[self.offsets[k]:self.offsets[k + 1]]}
+
+    def __iter__(self):
+        return iter(self.sorted_keys)
+
+    def __len__(self):
+        return len(self.sorted_keys)
+
+
+def default_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_key(directory):
+    """
+    Returns {filename: [size, mtime_ns]} for every CSV in the dataset.
+    """
+    key = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        key[filename] = [stat.st_size, stat.st_mtime_ns]
+    return key
+
+
+def save(path, key, buffers, strings):
+    """
+    Writes a snapshot. `buffers` maps the names in BUFFERS to index
+    arrays and `strings` maps the names in STRINGS to lists of str,
+    none of which may contain NUL.
+    """
+    payloads = []
+    for name in BUFFERS:
+        payloads.append((name, INDEX, buffers[name].tobytes()))
+    for name in STRINGS:
+        payloads.append((name, "s", _string_table(strings[name])))
+
+    sections = {}
+    chunks = []
+    offset = 0
+    for name, kind, payload in payloads:
+        size = binfile.padded(len(payload))
+        sections[name] = [offset, len(payload), kind]
+        offset += size
+        chunks.append(payload)
+        chunks.append(b"\0" * (size - len(payload)))
+    counts = {name: len(strings[name]) for name in STRINGS}
+
+    binfile.save(path, MAGIC, VERSION,
+                 {"key": key, "sections": sections, "counts": counts}, chunks)
+
+
+def load(path, key):
+    """
+    Memory-maps a snapshot. Returns (buffers, strings) like the
+    arguments to save, with buffers as memoryviews into the mapping
+    and strings as StringTables over it, or None if the file is
+    missing, damaged, of another version, or was built from different
+    CSVs than `key`.
+    """
+    loaded = binfile.load(path, MAGIC, VERSION)
+    if loaded is None:
+        return None
+    header, body = loaded
+
+    buffers = {}
+    strings = {}
+    try:
+        if header["key"] != key:
+            return None
+        if set(header["sections"]) != {*BUFFERS, *STRINGS}:
+            return None
+        for name, (offset, size, kind) in header["sections"].items():
+            if offset < 0 or size < 0 or offset + size > len(body):
+                return None
+            section = body[offset:offset + size]
+            if kind == "s":
+                count = header["counts"][name]
+                table = binfile.padded((count + 1) * INDEX_SIZE)
+                strings[name] = StringTable(section[:(count + 1) * INDEX_SIZE]
+                                            .cast(INDEX), section[table:])
+            else:
+                buffers[name] = section.cast(kind)
+    except binfile.DECODE_ERRORS:
+        return None
+    return buffers, strings
+
+
+def _string_table(strings):
+    """
+    Encodes strings as their start offsets followed by the strings,
+    each ended by a NUL.
+    """
+    data = ("\0".join(strings) + "\0").encode("utf-8") if strings else b""
+    # String i starts after the bytes of the ones before it and their NULs
+    lengths = map(len, data.split(b"\0")[:-1])
+    offsets = array(INDEX, map(add, accumulate(lengths, initial=0),
+                               range(len(strings) + 1)))
+    header = offsets.tobytes()
+    return header + b"\0" * (binfile.padded(len(header)) - len(header)) + data
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -5,34 +8,57 @@ class Node():
         self.action = action
 
 
-class StackFrontier():
+class IndexedStackFrontier():
+    """
+    List-backed stack frontier that keeps a count of the nodes held
+    for every state, so add, remove and contains_state are all O(1).
+    """
+
     def __init__(self):
         self.frontier = []
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def _take(self):
+        return self.frontier.pop()
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
+        node = self._take()
+        remaining = self.states[node.state] - 1
+        if remaining:
+            self.states[node.state] = remaining
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+            del self.states[node.state]
+        return node
 
+    def __len__(self):
+        return len(self.frontier)
 
-class QueueFrontier(StackFrontier):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+class IndexedQueueFrontier(IndexedStackFrontier):
+    """
+    Deque-backed queue frontier with the same state index.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = deque()
+
+    def _take(self):
+        return self.frontier.popleft()
+
+
+# The original names stay available as drop-in aliases
+StackFrontier = IndexedStackFrontier
+QueueFrontier = IndexedQueueFrontier
@@ -0,0 +1,100 @@
+"""
+Times full-tree minimax with the nested-list engine (tictactoe.py)
+against the bitboard engine (bitboard.py).
+
+"empty board" searches the whole game tree for the value of the
+starting position; "first replies" finds O's best move after each of
+X's nine opening moves. Both engines search the full tree, the list
+engine with its transposition table turned off. The rows marked
+"table" time tictactoe.py's own searches with the table, cleared
+before every run so each one is cold; bitboard.py has no table to
+compare them with.
+
+Usage: python bench_minimax.py [--repeat N]
+"""
+
+import argparse
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def best_of(repeat, function):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def cold(function):
+    """
+    Wraps a tictactoe.py search so it starts from an empty table.
+    """
+    def run():
+        ttt.clear_table()
+        return function()
+    return run
+
+
+def full_tree(function):
+    """
+    Wraps a tictactoe.py search so it runs without the table.
+    """
+    def run():
+        ttt.use_table = False
+        try:
+            return function()
+        finally:
+            ttt.use_table = True
+    return run
+
+
+def openings():
+    return [ttt.result(ttt.initial_state(), (i, j))
+            for i in range(3) for j in range(3)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    boards = openings()
+    encoded = [bitboard.encode(board) for board in boards]
+
+    # Both engines must agree on the value of every opening reply
+    for board, (x, o) in zip(boards, encoded):
+        assert ttt.max_val(ttt.result(board, ttt.minimax(board))) == \
+            bitboard.value(*bitboard.encode(
+                bitboard.result(board, bitboard.minimax(board))))
+
+    cases = [
+        ("empty board", full_tree(lambda: ttt.max_val(ttt.initial_state())),
+         lambda: bitboard.value(0, 0)),
+        ("first replies",
+         full_tree(lambda: [ttt.minimax_full(board) for board in boards]),
+         lambda: [bitboard.best_move(x, o) for x, o in encoded]),
+    ]
+    table_cases = [
+        ("empty board", cold(lambda: ttt.max_val(ttt.initial_state()))),
+        ("first replies", cold(lambda: [ttt.minimax(board) for board in boards])),
+    ]
+
+    print(f"{'search':<22}{'lists s':>10}{'bitboard s':>12}{'speedup':>10}")
+    for label, lists, bits in cases:
+        slow = best_of(args.repeat, lists)
+        fast = best_of(args.repeat, bits)
+        print(f"{label:<22}{slow:>10.3f}{fast:>12.3f}{slow / fast:>9.1f}x")
+    for label, lists in table_cases:
+        elapsed = best_of(args.repeat, lists)
+        info = ttt.cache_info()
+        print(f"{label + ' (table)':<22}{elapsed:>10.3f}{'-':>12}{'-':>10}  "
+              f"{info['size']} positions, {info['hit_rate']:.0%} hit rate")
+
+
+if __name__ == "__main__":
+    main()
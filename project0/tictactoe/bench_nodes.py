@@ -0,0 +1,52 @@
+"""
+Counts the positions visited per minimax call by the min_val/max_val
+search (minimax_full) and the alpha-beta search (minimax), each with
+and without the transposition table.
+
+The positions are the empty board, every opening move and every
+position after two moves; each call starts from an empty table.
+
+Usage: python bench_nodes.py
+"""
+
+import time
+
+import tictactoe as ttt
+
+SEARCHES = [
+    ("min/max", ttt.minimax_full, False),
+    ("min/max + table", ttt.minimax_full, True),
+    ("alpha-beta", ttt.minimax, False),
+    ("alpha-beta + table", ttt.minimax, True),
+]
+
+
+def positions():
+    layers = [[ttt.initial_state()]]
+    for _ in range(2):
+        layers.append([ttt.result(board, action) for board in layers[-1]
+                       for action in ttt.actions(board)])
+    return [board for layer in layers for board in layer]
+
+
+def main():
+    boards = positions()
+    print(f"{len(boards)} positions")
+    print(f"{'search':<20}{'nodes/call':>12}{'max nodes':>11}{'ms/call':>10}")
+    for label, search, use_table in SEARCHES:
+        ttt.use_table = use_table
+        counts = []
+        start = time.perf_counter()
+        for board in boards:
+            ttt.clear_table()
+            ttt.reset_nodes()
+            search(board)
+            counts.append(ttt.node_stats["nodes"])
+        elapsed = time.perf_counter() - start
+        print(f"{label:<20}{sum(counts) / len(counts):>12.0f}"
+              f"{max(counts):>11}{elapsed / len(boards) * 1000:>10.2f}")
+    ttt.use_table = True
+
+
+if __name__ == "__main__":
+    main()
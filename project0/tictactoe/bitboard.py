@@ -0,0 +1,268 @@
+"""
+Tic Tac Toe player on bitboards
+
+A position is a pair of 9-bit integers (x, o), one per mark, where bit
+3 * i + j is set when that mark is in cell (i, j). Wins are checked
+against eight precomputed line masks and moves never copy a board.
+
+The functions named like those of tictactoe.py take and return the
+same nested-list boards, so `import bitboard as ttt` works in runner.py
+for 3x3 games.
+"""
+
+import sys
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# The only board this engine plays, with the names tictactoe.py uses
+ROWS = 3
+COLS = 3
+K = 3
+EXACT_CELLS = 9
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals as bitmasks
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Single-cell masks with their (i, j) action
+CELLS = tuple((1 << (3 * i + j), (i, j)) for i in range(3) for j in range(3))
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return [[EMPTY, EMPTY, EMPTY],
+            [EMPTY, EMPTY, EMPTY],
+            [EMPTY, EMPTY, EMPTY]]
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitboards of a nested-list board.
+    """
+    x = o = 0
+    for bit, (i, j) in CELLS:
+        if board[i][j] == X:
+            x |= bit
+        elif board[i][j] == O:
+            o |= bit
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the nested-list board of (x, o) bitboards.
+    """
+    board = initial_state()
+    for bit, (i, j) in CELLS:
+        if x & bit:
+            board[i][j] = X
+        elif o & bit:
+            board[i][j] = O
+    return board
+
+
+# Bitboard engine
+
+def has_line(bits):
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def to_move(x, o):
+    """
+    X if X moves next, O otherwise (like player, ignores game over).
+    """
+    return X if bin(x).count("1") == bin(o).count("1") else O
+
+
+def free_cells(x, o):
+    taken = x | o
+    return [(bit, action) for bit, action in CELLS if not taken & bit]
+
+
+def bits_winner(x, o):
+    if has_line(x):
+        return X
+    if has_line(o):
+        return O
+    return None
+
+
+def bits_terminal(x, o):
+    return (x | o) == FULL or has_line(x) or has_line(o)
+
+
+def value(x, o):
+    """
+    Minimax value of a position: 1 if X wins with best play, -1 if O
+    does, 0 for a tie.
+    """
+    if has_line(x):
+        return 1
+    if has_line(o):
+        return -1
+    if (x | o) == FULL:
+        return 0
+
+    taken = x | o
+    if to_move(x, o) == X:
+        best = -1
+        for bit, _ in CELLS:
+            if not taken & bit:
+                best = max(best, value(x | bit, o))
+                if best == 1:
+                    break
+    else:
+        best = 1
+        for bit, _ in CELLS:
+            if not taken & bit:
+                best = min(best, value(x, o | bit))
+                if best == -1:
+                    break
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns the optimal (i, j) for the player to move, or None if the
+    game is over.
+    """
+    if bits_terminal(x, o):
+        return None
+
+    if to_move(x, o) == X:
+        best, move = -2, None
+        for bit, action in free_cells(x, o):
+            score = value(x | bit, o)
+            if score > best:
+                best, move = score, action
+                if best == 1:
+                    break
+    else:
+        best, move = 2, None
+        for bit, action in free_cells(x, o):
+            score = value(x, o | bit)
+            if score < best:
+                best, move = score, action
+                if best == -1:
+                    break
+    return move
+
+
+# Adapters with the tictactoe.py API
+
+# best moves looked up before searching, see use_book
+opening_book = None
+
+
+def configure(rows=3, cols=3, k=3):
+    """
+    Accepts only the 3x3, three in a row game.
+    """
+    if (rows, cols, k) != (ROWS, COLS, K):
+        raise ValueError(f"bitboard plays only {ROWS}x{COLS} with {K} in a row")
+
+
+def use_book(path=None):
+    """
+    Loads the 3x3 opening book from `path` (by default next to this
+    file), building and saving it first if it is missing.
+    """
+    global opening_book
+    from book import OpeningBook, default_path
+
+    path = path or default_path(ROWS, COLS, K)
+    opening_book = OpeningBook.load(path, ROWS, COLS, K)
+    if opening_book is None:
+        opening_book = OpeningBook.build(ROWS, COLS, K, initial_state(),
+                                         actions, result, terminal, minimax)
+        try:
+            opening_book.save(path)
+        except OSError as e:
+            print(f"Could not write opening book: {e}", file=sys.stderr)
+    return opening_book
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = encode(board)
+    if (x | o) == FULL:
+        return None
+    return to_move(x, o)
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {action for _, action in free_cells(*encode(board))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    x, o = encode(board)
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise Exception("Invalid Action")
+    bit = 1 << (3 * i + j)
+    if (x | o) & bit:
+        raise Exception("Invalid Action")
+    if to_move(x, o) == X:
+        return decode(x | bit, o)
+    return decode(x, o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return bits_winner(*encode(board))
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return bits_terminal(*encode(board))
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    mark = winner(board)
+    if mark == X:
+        return 1
+    if mark == O:
+        return -1
+    return 0
+
+
+def minimax(board, time_limit=None, max_depth=None, heuristic=None,
+            stop=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    The search is always exact and takes milliseconds, so the other
+    arguments are accepted for the tictactoe.py signature and ignored.
+    """
+    if opening_book is not None:
+        move = opening_book.move(board)
+        if move is not None:
+            return move
+    return best_move(*encode(board))
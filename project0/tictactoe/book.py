@@ -0,0 +1,220 @@
+"""
+Opening book: the best move of every reachable position, precomputed.
+
+A position is indexed by reading its cells in row order as a base-3
+number (EMPTY = 0, X = 1, O = 2), and the book is one byte per index
+holding the flat cell (i * cols + j) to play, or NO_MOVE for positions
+that are unreachable or over. For 3x3 that is 19683 bytes, and a
+lookup is one index computation and one array read.
+
+Usage: python book.py [output] [--rows R --cols C --k K] [--no-verify]
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+from array import array
+
+MAGIC = b"TTTBOOK\0"
+VERSION = 2
+PREAMBLE = struct.Struct("<8sII")
+
+# What reading a damaged book can raise; load treats these as no book
+DECODE_ERRORS = (struct.error, ValueError, IndexError, KeyError, TypeError)
+
+NO_MOVE = 255
+
+DIGITS = {None: 0, "X": 1, "O": 2}
+
+
+def index(board):
+    """
+    Base-3 number of a board, reading its cells in row order.
+    """
+    n = 0
+    for row in board:
+        for cell in row:
+            n = n * 3 + DIGITS[cell]
+    return n
+
+
+class OpeningBook():
+    def __init__(self, rows, cols, k, moves, positions):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.moves = moves
+        self.positions = positions
+
+    @classmethod
+    def build(cls, rows, cols, k, initial, actions, result, terminal, search):
+        """
+        Visits every position reachable from `initial` and stores the
+        move `search` picks for each one that is not over. The other
+        arguments are the functions of tictactoe.py, whose use_book only
+        builds books for boards of up to EXACT_CELLS cells.
+        """
+        moves = array("B", [NO_MOVE]) * 3 ** (rows * cols)
+        seen = set()
+        stack = [initial]
+        positions = 0
+        while stack:
+            board = stack.pop()
+            n = index(board)
+            if n in seen:
+                continue
+            seen.add(n)
+            if terminal(board):
+                continue
+            i, j = search(board)
+            moves[n] = i * cols + j
+            positions += 1
+            for action in actions(board):
+                stack.append(result(board, action))
+        return cls(rows, cols, k, moves, positions)
+
+    def move(self, board):
+        """
+        The stored (i, j) for board, or None if it has none.
+        """
+        cell = self.moves[index(board)]
+        if cell == NO_MOVE:
+            return None
+        return divmod(cell, self.cols)
+
+    def nbytes(self):
+        return len(self.moves) * self.moves.itemsize
+
+    def save(self, path):
+        header = json.dumps({
+            "key": [self.rows, self.cols, self.k],
+            "positions": self.positions,
+            "size": self.nbytes(),
+        }).encode("utf-8")
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            self.moves.tofile(f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, rows, cols, k):
+        """
+        Reads a book written by save. Returns None if the file is
+        missing, damaged, of another version, or for another board.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        try:
+            magic, version, length = PREAMBLE.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                return None
+            header = json.loads(data[PREAMBLE.size:PREAMBLE.size + length])
+            if header["key"] != [rows, cols, k]:
+                return None
+            start = PREAMBLE.size + length
+            if (header["size"] != 3 ** (rows * cols) or
+                    start + header["size"] != len(data)):
+                return None
+            moves = array("B", data[start:])
+            if any(cell >= rows * cols for cell in moves if cell != NO_MOVE):
+                return None
+            return cls(rows, cols, k, moves, header["positions"])
+        except DECODE_ERRORS:
+            return None
+
+
+def default_path(rows, cols, k):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        f".tictactoe-{rows}x{cols}-{k}.book")
+
+
+def verify(book, ttt):
+    """
+    Checks every position in the book against a live search: the book
+    move must be legal and reach the same minimax value as the move
+    ttt.minimax picks. Returns (positions checked, mismatches).
+    """
+    saved, ttt.opening_book = ttt.opening_book, None
+    checked = 0
+    mismatches = []
+    stack = [ttt.initial_state()]
+    seen = set()
+    while stack:
+        board = stack.pop()
+        n = index(board)
+        if n in seen or ttt.terminal(board):
+            continue
+        seen.add(n)
+        move = book.move(board)
+        live = ttt.minimax(board)
+        if (move not in ttt.actions(board) or
+                ttt.alphabeta(ttt.result(board, move), -2, 2) !=
+                ttt.alphabeta(ttt.result(board, live), -2, 2)):
+            mismatches.append((board, move, live))
+        checked += 1
+        for action in ttt.actions(board):
+            stack.append(ttt.result(board, action))
+    ttt.opening_book = saved
+    return checked, mismatches
+
+
+def main():
+    import tictactoe as ttt
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--no-verify", action="store_true",
+                        help="skip checking the book against live search")
+    args = parser.parse_args()
+
+    ttt.configure(args.rows, args.cols, args.k)
+    if args.rows * args.cols > ttt.EXACT_CELLS:
+        parser.error(f"boards over {ttt.EXACT_CELLS} cells are not "
+                     "searched exactly")
+
+    start = time.perf_counter()
+    book = OpeningBook.build(args.rows, args.cols, args.k, ttt.initial_state(),
+                             ttt.actions, ttt.result, ttt.terminal, ttt.minimax)
+    elapsed = time.perf_counter() - start
+    output = args.output or default_path(args.rows, args.cols, args.k)
+    book.save(output)
+    print(f"{book.positions} positions in {elapsed:.2f}s, "
+          f"{book.nbytes()} bytes written to {output}")
+
+    if not args.no_verify:
+        checked, mismatches = verify(book, ttt)
+        for board, move, live in mismatches[:10]:
+            print(f"Mismatch: book {move}, search {live} on {board}")
+        print(f"Verified {checked} positions, {len(mismatches)} mismatches")
+
+        boards = [ttt.initial_state()] + [
+            ttt.result(ttt.initial_state(), action)
+            for action in ttt.actions(ttt.initial_state())]
+        start = time.perf_counter()
+        for _ in range(1000):
+            for board in boards:
+                book.move(board)
+        lookup = (time.perf_counter() - start) / (1000 * len(boards))
+        start = time.perf_counter()
+        for board in boards:
+            ttt.clear_table()
+            ttt.minimax(board)
+        search = (time.perf_counter() - start) / len(boards)
+        print(f"Lookup {lookup * 1e6:.1f}us, cold search {search * 1e3:.1f}ms "
+              f"per move")
+
+
+if __name__ == "__main__":
+    main()
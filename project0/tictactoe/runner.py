@@ -1,8 +1,21 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
+from util import percentile
+
+# Optional board size: python runner.py [rows cols k]
+if len(sys.argv) == 4:
+    ttt.configure(*(int(arg) for arg in sys.argv[1:]))
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [rows cols k]")
+
+# Small boards play from the opening book, built on first use
+if ttt.ROWS * ttt.COLS <= ttt.EXACT_CELLS:
+    ttt.use_book()
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,18 +28,73 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Tiles are 80 pixels on 3x3 and shrink to fit bigger boards
+tile_size = min(80, (width - 40) // ttt.COLS, (height - 130) // ttt.ROWS)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", max(8, tile_size * 3 // 4))
+
+# The AI searches on a worker thread while frames keep being drawn; its
+# move is shown no sooner than AI_DELAY seconds after it started
+AI_DELAY = 0.5
+FPS = 60
+executor = ThreadPoolExecutor(max_workers=1)
+ai_move = None
+ai_stop = None
+ai_started = 0
+
+
+def cancel_ai_move():
+    """
+    Drops the pending AI move and tells its search to stop.
+    """
+    global ai_move
+    if ai_move is not None:
+        ai_stop.set()
+        ai_move.cancel()
+        ai_move = None
+
+
+# Frame times in milliseconds, printed as a histogram on exit
+FRAME_BUCKETS = [20, 33, 50, 100, 250, 1000]
+frame_times = []
+
+
+def print_frame_histogram():
+    if not frame_times:
+        return
+    ordered = sorted(frame_times)
+    print(f"{len(ordered)} frames, median {percentile(ordered, 0.5)} ms, "
+          f"p99 {percentile(ordered, 0.99)} ms, max {ordered[-1]} ms")
+    low = 0
+    for high in FRAME_BUCKETS + [None]:
+        count = sum(1 for t in ordered
+                    if t >= low and (high is None or t < high))
+        label = f"{low}-{high} ms" if high is not None else f">= {low} ms"
+        bar = "#" * round(50 * count / len(ordered))
+        print(f"{label:>12} {count:>7} {bar}")
+        low = high
+
+
+clock = pygame.time.Clock()
+was_pressed = False
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai_move()
+            executor.shutdown(wait=False)
+            print_frame_histogram()
             sys.exit()
 
+    # A click is the frame the left button goes down
+    pressed = pygame.mouse.get_pressed()[0] == 1
+    click = 1 if pressed and not was_pressed else 0
+    was_pressed = pressed
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -54,32 +122,28 @@ while True:
         screen.blit(playO, playORect)
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
         if click == 1:
             mouse = pygame.mouse.get_pos()
             if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.X
             elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.O
 
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (ttt.COLS / 2 * tile_size),
+                       height / 2 - (ttt.ROWS / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(ttt.ROWS):
             row = []
-            for j in range(3):
+            for j in range(ttt.COLS):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
                 )
-                pygame.draw.rect(screen, white, rect, 3)
+                pygame.draw.rect(screen, white, rect, 3 if tile_size > 30 else 1)
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
@@ -102,45 +166,47 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (int(time.perf_counter() * 3) % 3 + 1)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Start the AI move, or play it once it is ready
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_stop = threading.Event()
+                ai_started = time.perf_counter()
+                ai_move = executor.submit(ttt.minimax, board,
+                                          stop=ai_stop.is_set)
+            elif (ai_move.done() and
+                    time.perf_counter() - ai_started >= AI_DELAY):
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(ttt.ROWS):
+                for j in range(ttt.COLS):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Play Again after the game, Reset during it
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset",
+                                  True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                cancel_ai_move()
+                user = None
+                board = ttt.initial_state()
 
     pygame.display.flip()
+    frame_times.append(clock.tick(FPS))
@@ -0,0 +1,154 @@
+"""
+Headless self-play: plays many games with tictactoe.py, without pygame
+or the runner's sleeps, and reports games per second, who won, and how
+long the AI took per move (p50/p90/p99/max).
+
+A player is "ai" (tictactoe.minimax) or "random" (a uniformly random
+legal move). Games of a matchup are split into chunks that run in a
+process pool with --workers > 1.
+
+Usage: python selfplay.py [--games N] [--matchups ai-random random-ai ...]
+                          [--rows R --cols C --k K] [--time-limit S]
+                          [--book] [--workers N] [--seed S]
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+from collections import Counter
+
+import tictactoe as ttt
+from util import percentile
+
+MATCHUPS = ("ai-ai", "ai-random", "random-ai", "random-random")
+
+# Games per task handed to a worker
+CHUNK = 100
+
+# Time limit passed to minimax, set by init_worker
+time_limit = None
+
+
+def init_worker(options):
+    """
+    Sets up the board, time limit and book in a worker (or this
+    process) before it plays.
+    """
+    global time_limit
+
+    ttt.configure(options["rows"], options["cols"], options["k"])
+    time_limit = options["time_limit"]
+    if options["book"]:
+        ttt.use_book()
+
+
+def play_game(players, rng, latencies):
+    """
+    Plays one game; `players` maps X and O to "ai" or "random". Appends
+    the seconds of every AI move to latencies and returns the winner
+    (None for a tie) and the number of moves.
+    """
+    board = ttt.initial_state()
+    moves = 0
+    while not ttt.terminal(board):
+        if players[ttt.player(board)] == "ai":
+            start = time.perf_counter()
+            move = ttt.minimax(board, time_limit=time_limit)
+            latencies.append(time.perf_counter() - start)
+        else:
+            move = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, move)
+        moves += 1
+    return ttt.winner(board), moves
+
+
+def play_games(task):
+    """
+    Plays `count` games of a matchup. Returns (outcomes, moves,
+    latencies), where outcomes counts "X", "O" and "tie".
+    """
+    matchup, count, seed = task
+    x, o = matchup.split("-")
+    players = {ttt.X: x, ttt.O: o}
+    rng = random.Random(seed)
+    outcomes = Counter()
+    moves = 0
+    latencies = []
+    for _ in range(count):
+        winner, played = play_game(players, rng, latencies)
+        outcomes[winner or "tie"] += 1
+        moves += played
+    return outcomes, moves, latencies
+
+
+def run(matchup, games, seed, pool=None):
+    """
+    Plays `games` games of a matchup, in the pool if one is given.
+    Returns (outcomes, moves, latencies, elapsed seconds).
+    """
+    tasks = [(matchup, min(CHUNK, games - start), seed + start)
+             for start in range(0, games, CHUNK)]
+    start = time.perf_counter()
+    if pool is None:
+        results = map(play_games, tasks)
+    else:
+        results = pool.imap_unordered(play_games, tasks)
+
+    outcomes = Counter()
+    moves = 0
+    latencies = []
+    for chunk_outcomes, chunk_moves, chunk_latencies in results:
+        outcomes.update(chunk_outcomes)
+        moves += chunk_moves
+        latencies.extend(chunk_latencies)
+    return outcomes, moves, sorted(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000,
+                        help="games per matchup")
+    parser.add_argument("--matchups", nargs="+", choices=MATCHUPS,
+                        default=["ai-ai", "ai-random", "random-ai"])
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--time-limit", type=float,
+                        help="seconds per AI move (default: minimax's own)")
+    parser.add_argument("--book", action="store_true",
+                        help="let the AI play from the opening book")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.book and args.rows * args.cols > ttt.EXACT_CELLS:
+        parser.error(f"--book needs a board of at most {ttt.EXACT_CELLS} "
+                     "cells")
+
+    options = {"rows": args.rows, "cols": args.cols, "k": args.k,
+               "time_limit": args.time_limit, "book": args.book}
+    init_worker(options)
+    pool = None
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers, initializer=init_worker,
+                                    initargs=(options,))
+
+    print(f"{'matchup':<15}{'games/s':>9}{'X wins':>8}{'O wins':>8}{'ties':>7}"
+          f"{'moves':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    try:
+        for matchup in args.matchups:
+            outcomes, moves, latencies, elapsed = run(matchup, args.games,
+                                                      args.seed, pool)
+            print(f"{matchup:<15}{args.games / elapsed:>9.0f}"
+                  f"{outcomes['X']:>8}{outcomes['O']:>8}{outcomes['tie']:>7}"
+                  f"{moves / args.games:>8.1f}"
+                  + "".join(f"{percentile(latencies, fraction) * 1000:>9.2f}"
+                            for fraction in (0.5, 0.9, 0.99, 1.0)))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,29 @@ Tic Tac Toe Player
 
 import math
 import copy
+import sys
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# board size and how many marks in a row win, see configure
+ROWS = 3
+COLS = 3
+K = 3
+
+# boards with at most this many cells are searched exactly; larger ones
+# with iterative deepening for up to TIME_LIMIT seconds per move
+EXACT_CELLS = 9
+TIME_LIMIT = 1.0
+
 # the first state in which the board is in
 def initial_state():
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * COLS for _ in range(ROWS)]
 
 
 def player(board):
@@ -45,8 +55,8 @@ def actions(board):
     
     pActions = set()
 
-    for i in range(3):
-        for j in range(3):
+    for i in range(ROWS):
+        for j in range(COLS):
             if board[i][j] == EMPTY:
                 pActions.add((i, j))
     
@@ -60,7 +70,7 @@ def result(board, action):
     
     i, j = action
 
-    if i < 3 and j < 3 and board[i][j] is EMPTY:
+    if 0 <= i < ROWS and 0 <= j < COLS and board[i][j] is EMPTY:
         name = player(board)
         new = copy.deepcopy(board)
         new[i][j] = name
@@ -75,22 +85,10 @@ def winner(board):
     Returns the winner of the game, if there is one.
     """
 
-    # every winning move for horizontal
+    # every horizontal, vertical and diagonal run of K cells
     for mark in [X, O]:
-        for row in range(0, 3):
-            if all(board[row][col] == mark for col in range(0, 3)):
-                return mark
-        
-        # every winning move for vertical
-        for col in range(0, 3):
-            if all(board[row][col] == mark for row in range(0, 3)):
-                return mark
-        
-        # every move which can be made diagonally
-        diagonals = [[(0, 0), (1, 1), (2, 2)], [(0, 2), (1, 1), (2, 0)]]
-
-        for move in diagonals:
-            if all(board[row][col] == mark for (row, col) in move):
+        for line in LINES:
+            if all(board[row][col] == mark for (row, col) in line):
                 return mark
     
     # return None if it is a tie so far
@@ -123,22 +121,454 @@ def utility(board):
     else:
         return 0
 
+# every run of K cells in a row, column or diagonal, the lines through
+# every cell, the symmetries of the board and its center; set by configure
+LINES = []
+CELL_LINES = {}
+SYMMETRIES = []
+CENTER = (1, 1)
+
+
+def configure(rows=3, cols=3, k=3):
+    """
+    Sets the board to rows x cols with k in a row to win, and clears
+    the transposition table.
+    """
+    global ROWS, COLS, K, LINES, CELL_LINES, SYMMETRIES, CENTER, opening_book
+
+    if rows < 1 or cols < 1 or not 1 <= k <= max(rows, cols):
+        raise ValueError(f"no {k} in a row on a {rows}x{cols} board")
+    ROWS, COLS, K = rows, cols, k
+
+    LINES = []
+    for i in range(ROWS):
+        for j in range(COLS):
+            for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                line = [(i + n * di, j + n * dj) for n in range(K)]
+                if all(0 <= a < ROWS and 0 <= b < COLS for a, b in line):
+                    LINES.append(line)
+
+    CELL_LINES = {(i, j): [] for i in range(ROWS) for j in range(COLS)}
+    for line in LINES:
+        for cell in line:
+            CELL_LINES[cell].append(line)
+
+    # the flat cell index (i * COLS + j) each cell of a transformed board
+    # is read from; square boards also have the four transposed forms
+    transforms = [lambda i, j: (i, j), lambda i, j: (i, COLS - 1 - j),
+                  lambda i, j: (ROWS - 1 - i, j),
+                  lambda i, j: (ROWS - 1 - i, COLS - 1 - j)]
+    if ROWS == COLS:
+        transforms += [lambda i, j: (j, i), lambda i, j: (j, ROWS - 1 - i),
+                       lambda i, j: (COLS - 1 - j, i),
+                       lambda i, j: (COLS - 1 - j, ROWS - 1 - i)]
+    SYMMETRIES = [[a * COLS + b for a, b in
+                   (transform(i, j) for i in range(ROWS) for j in range(COLS))]
+                  for transform in transforms]
+
+    CENTER = ((ROWS - 1) / 2, (COLS - 1) / 2)
+    opening_book = None
+    clear_table()
+
+
+CODES = {EMPTY: 0, X: 1, O: 2}
+
+# transposition table: canonical board -> (value, flag), where the flag
+# says whether value is the exact minimax value or a bound on it
+EXACT, LOWER, UPPER = 0, 1, 2
+table = {}
+table_stats = {"hits": 0, "misses": 0}
+
+# set to False to search without the transposition table
+use_table = True
+
+# positions visited by min_val, max_val and alphabeta since reset_nodes
+node_stats = {"nodes": 0}
+
+# best moves looked up before searching, see use_book
+opening_book = None
+
+
+def use_book(path=None):
+    """
+    Loads the opening book for the configured board from `path` (by
+    default next to this file), building and saving it first if it is
+    missing or was built for another board.
+    """
+    global opening_book
+    from book import OpeningBook, default_path
+
+    if ROWS * COLS > EXACT_CELLS:
+        raise ValueError(f"no book for boards over {EXACT_CELLS} cells")
+
+    path = path or default_path(ROWS, COLS, K)
+    opening_book = OpeningBook.load(path, ROWS, COLS, K)
+    if opening_book is None:
+        opening_book = OpeningBook.build(ROWS, COLS, K, initial_state(),
+                                         actions, result, terminal, minimax)
+        try:
+            opening_book.save(path)
+        except OSError as e:
+            print(f"Could not write opening book: {e}", file=sys.stderr)
+    return opening_book
+
+
+# directions to walk from a cell when counting a run of marks
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+def canonical(board):
+    """
+    Returns the same key for a board and all of its rotations and
+    reflections.
+    """
+    cells = [CODES[cell] for row in board for cell in row]
+    return min(tuple(cells[k] for k in symmetry) for symmetry in SYMMETRIES)
+
+
+def cache_info():
+    """
+    Returns hit/miss statistics of the transposition table.
+    """
+    lookups = table_stats["hits"] + table_stats["misses"]
+    return {
+        "hits": table_stats["hits"],
+        "misses": table_stats["misses"],
+        "size": len(table),
+        "hit_rate": table_stats["hits"] / lookups if lookups else 0.0,
+    }
+
+
+def clear_table():
+    table.clear()
+    table_stats["hits"] = table_stats["misses"] = 0
+
+
+def reset_nodes():
+    node_stats["nodes"] = 0
+
+
+def completes_line(board, cell, mark):
+    """
+    True if putting mark in cell would give mark K in a row.
+    """
+    for line in CELL_LINES[cell]:
+        if all(board[i][j] == mark for (i, j) in line if (i, j) != cell):
+            return True
+    return False
+
+
+def ordered_actions(board):
+    """
+    Returns the actions best-first for pruning: winning moves, then
+    moves blocking the opponent's win, then by closeness to the center
+    (on 3x3: the center, corners and edges).
+    """
+    mark = player(board)
+    other = O if mark == X else X
+
+    def priority(action):
+        if completes_line(board, action, mark):
+            return (0, 0, 0)
+        if completes_line(board, action, other):
+            return (1, 0, 0)
+        return (2,) + centrality(action)
+
+    return sorted(actions(board), key=priority)
+
+
+def centrality(cell):
+    """
+    Sort key putting cells nearer the center first, and among cells
+    in the same ring around it the ones furthest along the diagonals.
+    """
+    di = abs(cell[0] - CENTER[0])
+    dj = abs(cell[1] - CENTER[1])
+    return (max(di, dj), -(di + dj))
+
+
 # the famous minimax algorithm
-def minimax(board):
+def minimax(board, time_limit=None, max_depth=None, heuristic=None,
+            stop=None):
     """
     Returns the optimal action for the current player on the board.
+
+    With an opening book loaded (use_book) the move is looked up.
+    Boards of up to EXACT_CELLS cells are searched to the end unless a
+    time_limit or max_depth is given. Otherwise the search deepens one
+    move at a time until time_limit seconds (TIME_LIMIT by default) are
+    used or max_depth is reached, scoring unfinished positions with
+    heuristic (evaluate by default), and returns the best move of the
+    deepest search that finished. That search also ends early once
+    stop(), if given, returns True.
+    """
+
+    if terminal(board):
+        return None
+
+    if opening_book is not None:
+        move = opening_book.move(board)
+        if move is not None:
+            return move
+
+    if (ROWS * COLS > EXACT_CELLS or time_limit is not None
+            or max_depth is not None):
+        return deepening_move(board, TIME_LIMIT if time_limit is None
+                              else time_limit, max_depth,
+                              heuristic or evaluate, stop)
+
+    maximizing = player(board) == X
+    alpha, beta = -2, 2
+    bestVal = -2 if maximizing else 2
+    bestMove = None
+
+    for action in ordered_actions(board):
+        moveVal = alphabeta(result(board, action), alpha, beta)
+
+        if maximizing and moveVal > bestVal:
+            bestVal, bestMove = moveVal, action
+            alpha = max(alpha, moveVal)
+        elif not maximizing and moveVal < bestVal:
+            bestVal, bestMove = moveVal, action
+            beta = min(beta, moveVal)
+
+        if bestVal == (1 if maximizing else -1):
+            break
+
+    return bestMove
+
+
+def alphabeta(board, alpha, beta):
+    """
+    Minimax value of board searched with alpha-beta pruning over
+    ordered_actions. A value outside (alpha, beta) is only a bound, and
+    goes into the transposition table as one; bounds found there narrow
+    the window, or answer outright when it closes.
+    """
+    node_stats["nodes"] += 1
+    if use_table:
+        key = canonical(board)
+        entry = table.get(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            elif flag == UPPER:
+                beta = min(beta, value)
+            if flag == EXACT or alpha >= beta:
+                table_stats["hits"] += 1
+                return value
+        table_stats["misses"] += 1
+
+    if terminal(board):
+        value = utility(board)
+        if use_table:
+            table[key] = (value, EXACT)
+        return value
+
+    low, high = alpha, beta
+    if player(board) == X:
+        value = -2
+        for action in ordered_actions(board):
+            value = max(value, alphabeta(result(board, action), alpha, beta))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = 2
+        for action in ordered_actions(board):
+            value = min(value, alphabeta(result(board, action), alpha, beta))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+    # a fail-high result is a lower bound and a fail-low one an upper
+    # bound, except at 1 and -1 where nothing lies beyond them
+    if use_table:
+        if value >= high and value != 1:
+            table[key] = (value, LOWER)
+        elif value <= low and value != -1:
+            table[key] = (value, UPPER)
+        else:
+            table[key] = (value, EXACT)
+    return value
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(board):
+    """
+    Default heuristic, from X's point of view, strictly between -1 and
+    1: every run of K cells holding marks of only one player counts for
+    that player, more the more marks it holds.
+    """
+    score = 0
+    for line in LINES:
+        x = o = 0
+        for (i, j) in line:
+            cell = board[i][j]
+            if cell == X:
+                x += 1
+            elif cell == O:
+                o += 1
+        if x and not o:
+            score += 4 ** x
+        elif o and not x:
+            score -= 4 ** o
+    return 0.99 * math.tanh(score / 4 ** K)
+
+
+def run_length(board, cell, mark):
+    """
+    Longest run of mark through cell, counting cell itself as mark.
+    """
+    i, j = cell
+    longest = 0
+    for di, dj in DIRECTIONS:
+        run = 1
+        for sign in (1, -1):
+            a, b = i + sign * di, j + sign * dj
+            while 0 <= a < ROWS and 0 <= b < COLS and board[a][b] == mark:
+                run += 1
+                a, b = a + sign * di, b + sign * dj
+        longest = max(longest, run)
+    return longest
+
+
+def candidate_actions(board, mark):
+    """
+    Empty cells next to a mark (or the center cell on an empty board),
+    best-first: wins, blocks, then longer runs and central cells.
+    """
+    other = O if mark == X else X
+    candidates = set()
+    for i in range(ROWS):
+        for j in range(COLS):
+            if board[i][j] is not EMPTY:
+                for a in range(max(0, i - 1), min(ROWS, i + 2)):
+                    for b in range(max(0, j - 1), min(COLS, j + 2)):
+                        if board[a][b] is EMPTY:
+                            candidates.add((a, b))
+    if not candidates:
+        return [min(actions(board), key=centrality)] if actions(board) else []
+
+    def priority(cell):
+        own = run_length(board, cell, mark)
+        blocked = run_length(board, cell, other)
+        if own >= K:
+            return (0, 0) + centrality(cell)
+        if blocked >= K:
+            return (1, 0) + centrality(cell)
+        return (2, -max(own, blocked)) + centrality(cell)
+
+    return sorted(candidates, key=priority)
+
+
+def deepening_move(board, time_limit, max_depth, heuristic, stop=None):
+    """
+    Iterative deepening depth-limited alpha-beta from board.
+    """
+    deadline = time.perf_counter() + time_limit
+
+    def expired():
+        return time.perf_counter() > deadline or (stop is not None and stop())
+
+    work = [row[:] for row in board]
+    mark = player(board)
+    empty = sum(row.count(EMPTY) for row in board)
+    moves = candidate_actions(work, mark)
+    # a winning move, or the only move worth searching
+    if len(moves) == 1 or run_length(work, moves[0], mark) >= K:
+        return moves[0]
+
+    best = moves[0]
+    limit = empty if max_depth is None else min(max_depth, empty)
+    for depth in range(1, limit + 1):
+        try:
+            move, score = limited_root(work, moves, mark, depth, empty,
+                                       expired, heuristic)
+        except SearchTimeout:
+            break
+        best = move
+        # search the best move first at the next depth
+        moves.remove(move)
+        moves.insert(0, move)
+        if abs(score) == 1:
+            break
+    return best
+
+
+def limited_root(board, moves, mark, depth, empty, expired, heuristic):
+    maximizing = mark == X
+    alpha, beta = -2, 2
+    best, bestVal = moves[0], (-2 if maximizing else 2)
+    for (i, j) in moves:
+        board[i][j] = mark
+        try:
+            value = limited_value(board, (i, j), depth - 1, empty - 1,
+                                  alpha, beta, expired, heuristic)
+        finally:
+            board[i][j] = EMPTY
+        if maximizing and value > bestVal:
+            best, bestVal = (i, j), value
+            alpha = max(alpha, value)
+        elif not maximizing and value < bestVal:
+            best, bestVal = (i, j), value
+            beta = min(beta, value)
+    return best, bestVal
+
+
+def limited_value(board, last, depth, empty, alpha, beta, expired, heuristic):
+    """
+    Depth-limited alpha-beta value of board, where `last` was the move
+    just made on it. Raises SearchTimeout once expired() is True.
+    """
+    node_stats["nodes"] += 1
+    if expired():
+        raise SearchTimeout()
+
+    moved = board[last[0]][last[1]]
+    if run_length(board, last, moved) >= K:
+        return 1 if moved == X else -1
+    if empty == 0:
+        return 0
+    if depth == 0:
+        return heuristic(board)
+
+    mark = O if moved == X else X
+    value = -2 if mark == X else 2
+    for (i, j) in candidate_actions(board, mark):
+        board[i][j] = mark
+        try:
+            child = limited_value(board, (i, j), depth - 1, empty - 1,
+                                  alpha, beta, expired, heuristic)
+        finally:
+            board[i][j] = EMPTY
+        if mark == X:
+            value = max(value, child)
+            alpha = max(alpha, value)
+        else:
+            value = min(value, child)
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return value
+
+
+def minimax_full(board):
+    """
+    Optimal action found with min_val and max_val, which search every
+    reply until one reaches the best possible value.
     """
     
     if terminal(board):
         return None
     
     if player(board) == X:
-        bestVal = -1
-        bestMove = (-1, -1)
-        a = sum(row.count(EMPTY) for row in board)
-        
-        if a == 9:
-            return bestMove
+        bestVal = -2
+        bestMove = None
         
         for action in actions(board):
             moveVal = min_val(result(board, action))
@@ -148,13 +578,14 @@ def minimax(board):
                 break
 
             if moveVal > bestVal:
+                bestVal = moveVal
                 bestMove = action
         
         return bestMove
     
     if player(board) == O:
-        bestVal = 1
-        bestMove = (-1, -1)
+        bestVal = 2
+        bestMove = None
 
         for action in actions(board):
             moveVal = max_val(result(board, action))
@@ -164,12 +595,22 @@ def minimax(board):
                 break
 
             if moveVal < bestVal:
+                bestVal = moveVal
                 bestMove = action
         
         return bestMove
 
 
 def min_val(board):
+    node_stats["nodes"] += 1
+    if use_table:
+        key = canonical(board)
+        entry = table.get(key)
+        if entry is not None and entry[1] == EXACT:
+            table_stats["hits"] += 1
+            return entry[0]
+        table_stats["misses"] += 1
+
     if terminal(board):
         return utility(board)
     
@@ -181,10 +622,21 @@ def min_val(board):
         if value == -1:
             break
     
+    if use_table:
+        table[key] = (value, EXACT)
     return value
 
 
 def max_val(board):
+    node_stats["nodes"] += 1
+    if use_table:
+        key = canonical(board)
+        entry = table.get(key)
+        if entry is not None and entry[1] == EXACT:
+            table_stats["hits"] += 1
+            return entry[0]
+        table_stats["misses"] += 1
+
     if terminal(board):
         return utility(board)
     
@@ -195,4 +647,9 @@ def max_val(board):
         if value == 1:
             break
     
-    return value
\ No newline at end of file
+    if use_table:
+        table[key] = (value, EXACT)
+    return value
+
+
+configure()
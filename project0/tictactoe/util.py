@@ -0,0 +1,12 @@
+"""
+Helpers shared by runner.py and selfplay.py.
+"""
+
+
+def percentile(ordered, fraction):
+    """
+    Value at `fraction` of the way through a sorted list, 0.0 if empty.
+    """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -0,0 +1,93 @@
+"""
+Times MinesweeperAI.add_knowledge, which runs all inference, per move
+on large boards.
+
+Every game is played to the end: the AI makes a safe move when it
+knows one and otherwise a random one, and a random move that hits a
+mine is told to the AI as a mine instead of ending the game.
+
+Usage: python bench_inference.py [--boards 16x30x99 100x100x1600 ...]
+                                 [--games N] [--seed S]
+"""
+
+import argparse
+import random
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def board_size(text):
+    height, width, mines = (int(part) for part in text.split("x"))
+    return height, width, mines
+
+
+def play(height, width, mines, rng):
+    """
+    Plays one game. Returns the seconds of every add_knowledge call and
+    the most sentences known at once.
+    """
+    random.seed(rng.random())
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, total_mines=mines)
+
+    unknown = [(i, j) for i in range(height) for j in range(width)]
+    rng.shuffle(unknown)
+    times = []
+    largest = 0
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            while unknown and (unknown[-1] in ai.moves_made or
+                               unknown[-1] in ai.mines):
+                unknown.pop()
+            if not unknown:
+                return times, largest
+            move = unknown.pop()
+            if game.is_mine(move):
+                ai.mark_mine(move)
+                ai.update_self_and_sentences()
+                continue
+
+        start = time.perf_counter()
+        ai.add_knowledge(move, game.nearby_mines(move))
+        times.append(time.perf_counter() - start)
+        largest = max(largest, len(ai.sentences))
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boards", type=board_size, nargs="+",
+                        default=[(16, 30, 99), (50, 50, 400),
+                                 (100, 100, 1600)],
+                        help="boards as HEIGHTxWIDTHxMINES")
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'board':>14}{'moves':>8}{'total s':>9}{'mean ms':>9}"
+          f"{'p50 ms':>8}{'p99 ms':>8}{'max ms':>8}{'sentences':>11}")
+    for height, width, mines in args.boards:
+        times = []
+        largest = 0
+        for _ in range(args.games):
+            game_times, game_largest = play(height, width, mines, rng)
+            times.extend(game_times)
+            largest = max(largest, game_largest)
+        times.sort()
+        print(f"{f'{height}x{width}x{mines}':>14}{len(times):>8}"
+              f"{sum(times):>9.2f}{sum(times) / len(times) * 1000:>9.3f}"
+              f"{percentile(times, 0.5) * 1000:>8.3f}"
+              f"{percentile(times, 0.99) * 1000:>8.3f}"
+              f"{times[-1] * 1000:>8.2f}{largest:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures how many moves per second MinesweeperAI plays on large boards,
+counting board setup, move choice and add_knowledge.
+
+The AI makes a safe move when it knows one and otherwise guesses with
+make_random_move. A guess that hits a mine is told to the AI as a mine
+instead of ending the game, so every game runs until the AI has no
+move left (or --max-moves is reached).
+
+Usage: python bench_moves.py [--boards 100x100x1500 1000x1000x150000 ...]
+                             [--max-moves N] [--seed S]
+"""
+
+import argparse
+import random
+import time
+
+from bench_inference import board_size
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(height, width, mines, max_moves=None):
+    """
+    Plays one game. Returns (moves, guesses, mines hit, seconds, seconds
+    spent choosing guesses, seconds to set up the board and AI).
+    """
+    start = time.perf_counter()
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, total_mines=mines)
+    setup = time.perf_counter() - start
+
+    moves = guesses = hits = 0
+    guessing = 0
+    while max_moves is None or moves < max_moves:
+        move = ai.make_safe_move()
+        if move is None:
+            before = time.perf_counter()
+            move = ai.make_random_move()
+            guessing += time.perf_counter() - before
+            if move is None:
+                break
+            guesses += 1
+            if game.is_mine(move):
+                hits += 1
+                ai.mark_mine(move)
+                ai.update_self_and_sentences()
+                continue
+        ai.add_knowledge(move, game.nearby_mines(move))
+        moves += 1
+    return moves, guesses, hits, time.perf_counter() - start, guessing, setup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boards", type=board_size, nargs="+",
+                        default=[(8, 8, 8), (16, 30, 99), (100, 100, 1500),
+                                 (1000, 1000, 150000)],
+                        help="boards as HEIGHTxWIDTHxMINES")
+    parser.add_argument("--max-moves", type=int,
+                        help="stop each game after this many moves")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f"{'board':>20}{'setup s':>9}{'moves':>9}{'guesses':>9}{'hits':>7}"
+          f"{'total s':>9}{'guess s':>9}{'moves/s':>10}")
+    for height, width, mines in args.boards:
+        moves, guesses, hits, elapsed, guessing, setup = play(
+            height, width, mines, args.max_moves)
+        print(f"{f'{height}x{width}x{mines}':>20}{setup:>9.2f}{moves:>9}"
+              f"{guesses:>9}{hits:>7}{elapsed:>9.2f}{guessing:>9.2f}"
+              f"{moves / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
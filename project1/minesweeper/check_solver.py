@@ -0,0 +1,133 @@
+"""
+Checks solver.mine_probabilities against brute force.
+
+Games are played with MinesweeperAI, and every time it has to guess,
+its sentences are handed both to the solver and to a brute-force count
+that tries every mine assignment to the frontier cells, weighting each
+by the ways to place the remaining mines on the unconstrained cells.
+Positions whose frontier has more than --max-frontier cells are
+skipped. Any probability differing by more than 1e-9 is reported.
+
+Usage: python check_solver.py [--boards 5x5x5 8x8x10 ...] [--games N]
+                              [--max-frontier N] [--seed S]
+"""
+
+import argparse
+import math
+import random
+from itertools import product
+
+from bench_inference import board_size
+from minesweeper import Minesweeper, MinesweeperAI
+from solver import mine_probabilities
+
+TOLERANCE = 1e-9
+
+
+def brute_force(constraints, unconstrained, remaining):
+    """
+    Same result as solver.mine_probabilities, found by trying every
+    assignment to the frontier cells.
+    """
+    frontier = sorted(set().union(*(cells for cells, _ in constraints)))
+    mined = dict.fromkeys(frontier, 0)
+    other = 0
+    total = 0
+    for values in product((0, 1), repeat=len(frontier)):
+        assignment = dict(zip(frontier, values))
+        if any(sum(assignment[cell] for cell in cells) != count
+               for cells, count in constraints):
+            continue
+        mines = sum(values)
+        if not 0 <= remaining - mines <= unconstrained:
+            continue
+        ways = math.comb(unconstrained, remaining - mines)
+        total += ways
+        other += ways * (remaining - mines)
+        for cell, value in assignment.items():
+            mined[cell] += ways * value
+    if not total:
+        return None
+    return ({cell: n / total for cell, n in mined.items()},
+            other / total / unconstrained if unconstrained else None)
+
+
+def matches(solved, expected):
+    if solved is None or expected is None:
+        return solved is expected
+    probabilities, other = solved
+    want, want_other = expected
+    if probabilities.keys() != want.keys():
+        return False
+    if (other is None) != (want_other is None):
+        return False
+    if other is not None and abs(other - want_other) > TOLERANCE:
+        return False
+    return all(abs(probabilities[cell] - want[cell]) <= TOLERANCE
+               for cell in want)
+
+
+def play(height, width, mines, max_frontier):
+    """
+    Plays one game, checking the solver at every guess. Returns
+    (positions checked, positions that did not match).
+    """
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, total_mines=mines)
+    checked = 0
+    failures = []
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            if ai.containing and len(ai.containing) <= max_frontier:
+                constraints = [(sentence.cells, sentence.count)
+                               for sentence in ai.sentences.values()]
+                unknown = height * width - len(ai.safes) - len(ai.mines)
+                unconstrained = unknown - len(ai.containing)
+                remaining = mines - len(ai.mines)
+                solved = mine_probabilities(constraints, unconstrained,
+                                            remaining, time_limit=10)
+                expected = brute_force(constraints, unconstrained, remaining)
+                checked += 1
+                if not matches(solved, expected):
+                    failures.append((constraints, solved, expected))
+            move = ai.make_random_move()
+            if move is None:
+                return checked, failures
+            if game.is_mine(move):
+                ai.mark_mine(move)
+                ai.update_self_and_sentences()
+                continue
+        ai.add_knowledge(move, game.nearby_mines(move))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boards", type=board_size, nargs="+",
+                        default=[(5, 5, 5), (6, 6, 8), (8, 8, 10)],
+                        help="boards as HEIGHTxWIDTHxMINES")
+    parser.add_argument("--games", type=int, default=20,
+                        help="games per board")
+    parser.add_argument("--max-frontier", type=int, default=14,
+                        help="skip positions with more frontier cells")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    checked = 0
+    failures = []
+    for height, width, mines in args.boards:
+        for _ in range(args.games):
+            game_checked, game_failures = play(height, width, mines,
+                                               args.max_frontier)
+            checked += game_checked
+            failures.extend(game_failures)
+
+    for constraints, solved, expected in failures[:10]:
+        print(f"Mismatch on {constraints}:\n  solver      {solved}\n"
+              f"  brute force {expected}")
+    print(f"{checked - len(failures)} of {checked} positions matched")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+import itertools
 import random
+from array import array
+
+from solver import mine_probabilities
 
 
 class Minesweeper():
@@ -14,20 +18,13 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = [[False] * self.width for _ in range(self.height)]
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, drawing distinct cells at once
+        for n in random.sample(range(height * width), mines):
+            i, j = divmod(n, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -100,6 +97,12 @@ class Sentence():
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Hashable value equal for sentences that are equal.
+        """
+        return (frozenset(self.cells), self.count)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -144,16 +147,65 @@ class Sentence():
         return 0
 
 
+class CellPool():
+    """
+    Set of cells of a height x width board with O(1) add, remove and
+    random choice: cells are numbered i * width + j and kept in a list,
+    with each cell's position in the list, so removing one moves the
+    last cell into its place.
+    """
+
+    def __init__(self, height, width, full=False):
+        self.width = width
+        size = height * width
+        if full:
+            self.cells = array("l", range(size))
+            self.position = array("l", range(size))
+        else:
+            self.cells = array("l")
+            self.position = array("l", [-1]) * size
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.position[cell[0] * self.width + cell[1]] != -1
+
+    def add(self, cell):
+        n = cell[0] * self.width + cell[1]
+        if self.position[n] == -1:
+            self.position[n] = len(self.cells)
+            self.cells.append(n)
+
+    def discard(self, cell):
+        n = cell[0] * self.width + cell[1]
+        at = self.position[n]
+        if at != -1:
+            last = self.cells.pop()
+            if last != n:
+                self.cells[at] = last
+                self.position[last] = at
+            self.position[n] = -1
+
+    def last(self):
+        return divmod(self.cells[-1], self.width) if self.cells else None
+
+    def choice(self):
+        return divmod(random.choice(self.cells), self.width)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, total_mines=None):
 
-        # Set initial height and width
+        # Set initial height and width, and how many mines there are
+        # (None if unknown, in which case guesses are uniformly random)
         self.height = height
         self.width = width
+        self.total_mines = total_mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -162,8 +214,34 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells not yet played, and cells neither played nor known
+        # to be mines, for moves in O(1)
+        self.safe_moves = CellPool(height, width)
+        self.candidates = CellPool(height, width, full=True)
+
+        # Sentences about the game known to be true, by id
+        self.sentences = {}
+        self.sentence_ids = itertools.count()
+
+        # Ids of the sentences containing each cell, and of each
+        # distinct sentence by its key
+        self.containing = {}
+        self.by_key = {}
+        self.keys = {}
+
+        # Ids of sentences changed since they were last looked at, and
+        # since they were last compared with the others for inferences
+        self.dirty = set()
+        self.uncompared = set()
+
+    @property
+    def knowledge(self):
+        """
+        List of the sentences known to be true, as in the original
+        list-based AI. It is a copy: change knowledge through
+        add_knowledge, mark_mine and mark_safe.
+        """
+        return list(self.sentences.values())
 
     def mark_mine(self, cell):
         """
@@ -172,8 +250,10 @@ class MinesweeperAI():
         """
         counter = 0
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            counter += sentence.mark_mine(cell)
+        self.candidates.discard(cell)
+        for sentence_id in self.containing.pop(cell, ()):
+            counter += self.sentences[sentence_id].mark_mine(cell)
+            self._changed(sentence_id)
         return counter
 
     def mark_safe(self, cell):
@@ -183,10 +263,72 @@ class MinesweeperAI():
         """
         counter = 0
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            counter += sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence_id in self.containing.pop(cell, ()):
+            counter += self.sentences[sentence_id].mark_safe(cell)
+            self._changed(sentence_id)
         return counter
 
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence about cells to the knowledge, leaving out cells
+        already known to be safe or mines. Returns its id (that of the
+        equal sentence if one is known), or None if no unknown cells
+        are left.
+        """
+        cells = set(cells)
+        count -= len(cells & self.mines)
+        cells -= self.mines
+        cells -= self.safes
+        if not cells:
+            return None
+
+        sentence = Sentence(cells, count)
+        key = sentence.key()
+        if key in self.by_key:
+            return self.by_key[key]
+
+        sentence_id = next(self.sentence_ids)
+        self.sentences[sentence_id] = sentence
+        for cell in cells:
+            self.containing.setdefault(cell, set()).add(sentence_id)
+        self.by_key[key] = sentence_id
+        self.keys[sentence_id] = key
+        self.dirty.add(sentence_id)
+        self.uncompared.add(sentence_id)
+        return sentence_id
+
+    def remove_sentence(self, sentence_id):
+        sentence = self.sentences.pop(sentence_id)
+        for cell in sentence.cells:
+            ids = self.containing[cell]
+            ids.discard(sentence_id)
+            if not ids:
+                del self.containing[cell]
+        key = self.keys.pop(sentence_id)
+        if self.by_key.get(key) == sentence_id:
+            del self.by_key[key]
+        self.dirty.discard(sentence_id)
+        self.uncompared.discard(sentence_id)
+
+    def _changed(self, sentence_id):
+        """
+        Re-keys a sentence after a cell was taken out of it, dropping it
+        if it is now empty or equals another sentence, and queues it to
+        be looked at and compared again.
+        """
+        del self.by_key[self.keys[sentence_id]]
+        sentence = self.sentences[sentence_id]
+        key = sentence.key()
+        self.keys[sentence_id] = key
+        if not sentence.cells or key in self.by_key:
+            self.remove_sentence(sentence_id)
+            return
+        self.by_key[key] = sentence_id
+        self.dirty.add(sentence_id)
+        self.uncompared.add(sentence_id)
+
     def add_knowledge(self, cell, count):
         """
         Called when the Minesweeper board tells us, for a given
@@ -204,6 +346,8 @@ class MinesweeperAI():
         """
 
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
+        self.candidates.discard(cell)
         self.mark_safe(cell)
 
         i, j = cell
@@ -214,14 +358,14 @@ class MinesweeperAI():
                 if (p, q) != (i, j):
                     others.add((p, q))
 
-        self.knowledge.append(Sentence(others, count))
+        self.add_sentence(others, count)
         self.update_self_and_sentences()
 
         inferences = self.new_inferences()
 
         while inferences:
             for sentence in inferences:
-                self.knowledge.append(sentence)
+                self.add_sentence(sentence.cells, sentence.count)
 
             self.update_self_and_sentences()
 
@@ -238,17 +382,7 @@ class MinesweeperAI():
         and self.moves_made, but should not modify any of those values.
         """
 
-        moves = self.safes.copy()
-        moves -= self.moves_made
-
-        if len(moves) == 0:
-            return None
-
-        return moves.pop()
-
-
-    def _rand_cell(self):
-        return (random.randrange(self.height), random.randrange(self.height))
+        return self.safe_moves.last()
 
 
     def make_random_move(self):
@@ -259,59 +393,115 @@ class MinesweeperAI():
             2) are not known to be mines
         """
 
-        # 8 * 8 - 8 ---> 56
-        if len(self.moves_made) == 56:
+        if not self.candidates:
             return None
 
-        random = self._rand_cell()
-        unsafe_moves = self.moves_made | self.mines
+        if self.total_mines is None:
+            return self.candidates.choice()
 
-        while random in unsafe_moves:
-            random = self._rand_cell()
+        # every cell without a mine has been played
+        if len(self.moves_made) == self.height * self.width - self.total_mines:
+            return None
 
-        return random
+        # with no sentences every unknown cell is as likely a mine as
+        # any other, so there is nothing to solve
+        if not self.containing:
+            return self.candidates.choice()
+
+        guess = self.safest_guess()
+        if guess is not None:
+            return guess
+
+        # a cell outside every sentence; there is one, or safest_guess
+        # would have picked a cell in a sentence
+        for _ in range(100):
+            cell = self.candidates.choice()
+            if cell not in self.containing:
+                return cell
+        return random.choice([divmod(n, self.width)
+                              for n in self.candidates.cells
+                              if divmod(n, self.width) not in self.containing])
+
+    def mine_probabilities(self):
+        """
+        Returns ({cell: probability of a mine} for every cell in some
+        sentence, probability of a mine in any other cell not yet known).
+
+        The probabilities are exact when the solver finishes within its
+        time limit, and otherwise each cell gets the highest mine density
+        of the sentences it is in.
+        """
+        constraints = [(sentence.cells, sentence.count)
+                       for sentence in self.sentences.values()]
+        unknown = self.height * self.width - len(self.safes) - len(self.mines)
+        unconstrained = unknown - len(self.containing)
+        remaining = self.total_mines - len(self.mines)
+
+        solved = mine_probabilities(constraints, unconstrained, remaining)
+        if solved is not None:
+            return solved
+
+        probabilities = {}
+        for cells, count in constraints:
+            for cell in cells:
+                probabilities[cell] = max(probabilities.get(cell, 0),
+                                          count / len(cells))
+        other = remaining / unknown if unconstrained else None
+        return probabilities, other
+
+    def safest_guess(self):
+        """
+        Returns the cell in some sentence least likely to be a mine, or
+        None if a cell outside every sentence is at least as safe.
+        """
+        probabilities, other = self.mine_probabilities()
+        if not probabilities:
+            return None
+        lowest = min(probabilities.values())
+        if other is not None and other <= lowest:
+            return None
+        return random.choice([cell for cell, p in probabilities.items()
+                              if p == lowest])
 
     def update_self_and_sentences(self):
-        # repeat update if an update was made in the previous cycle
-        i = 1
-        while i:
-            i = 0
-            for sentence in self.knowledge:
-                for cell in sentence.known_safes():
-                    self.mark_safe(cell)
-                    i += 1
-                for cell in sentence.known_mines():
-                    self.mark_mine(cell)
-                    i += 1
-            for cell in self.safes:
-                i += self.mark_safe(cell)
-            for cell in self.mines:
-                i += self.mark_mine(cell)
+        # only sentences changed since they were last looked at can tell
+        # us anything new; marking a cell puts the sentences holding it
+        # back on the worklist, or drops them once they are empty
+        while self.dirty:
+            sentence_id = self.dirty.pop()
+            sentence = self.sentences[sentence_id]
+            for cell in sentence.known_safes():
+                self.mark_safe(cell)
+            for cell in sentence.known_mines():
+                self.mark_mine(cell)
 
     def new_inferences(self):
-        removals = []
-        inferences = []
-
-        for sentence1 in self.knowledge:
-            if sentence1.cells == set():
-                removals.append(sentence1)
-                continue
-
-            for sentence2 in self.knowledge:
-                if sentence2.cells == set():
-                    removals.append(sentence2)
+        # a sentence that is a subset of another gives the difference of
+        # the two; only pairs with a sentence added or changed since the
+        # last call, and sharing a cell, can give anything new
+        inferences = {}
+
+        for sentence_id in self.uncompared:
+            sentence1 = self.sentences[sentence_id]
+            candidates = set()
+            for cell in sentence1.cells:
+                candidates |= self.containing[cell]
+            candidates.discard(sentence_id)
+
+            for other_id in candidates:
+                sentence2 = self.sentences[other_id]
+                if sentence2.cells < sentence1.cells:
+                    larger, smaller = sentence1, sentence2
+                elif sentence1.cells < sentence2.cells:
+                    larger, smaller = sentence2, sentence1
+                else:
                     continue
 
-                if sentence1 != sentence2:
-                    if sentence2.cells.issubset(sentence1.cells):
-                        diff_cells = sentence1.cells.difference(sentence2.cells)
-                        diff_count = sentence1.count - sentence2.count
-
-                        new_inference = Sentence(diff_cells, diff_count)
-
-                        if new_inference not in self.knowledge:
-                            inferences.append(new_inference)
-
-        self.knowledge = [x for x in self.knowledge if x not in removals]
+                diff_cells = larger.cells - smaller.cells
+                diff_count = larger.count - smaller.count
+                key = (frozenset(diff_cells), diff_count)
+                if key not in self.by_key:
+                    inferences[key] = Sentence(diff_cells, diff_count)
 
-        return inferences
+        self.uncompared.clear()
+        return list(inferences.values())
@@ -8,6 +8,12 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Optional board size: python runner.py [height width mines]
+if len(sys.argv) == 4:
+    HEIGHT, WIDTH, MINES = (int(arg) for arg in sys.argv[1:])
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [height width mines]")
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -28,7 +34,7 @@ largeFont = pygame.font.Font(OPEN_SANS, 40)
 BOARD_PADDING = 20
 board_width = ((2 / 3) * width) - (BOARD_PADDING * 2)
 board_height = height - (BOARD_PADDING * 2)
-cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
+cell_size = max(1, int(min(board_width / WIDTH, board_height / HEIGHT)))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
 
 # Add images
@@ -39,7 +45,7 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, total_mines=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -195,7 +201,7 @@ while True:
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, total_mines=MINES)
             revealed = set()
             flags = set()
             lost = False
@@ -0,0 +1,227 @@
+"""
+Mine probabilities for Minesweeper by constraint satisfaction.
+
+The constraints are the AI's sentences: a set of unknown cells holding
+`count` mines. Cells in at least one constraint (the frontier) are split
+into independent components, cells of different components never
+sharing a constraint. The mine assignments of each component that meet
+all its constraints are enumerated by backtracking and counted by how
+many mines they use.
+
+Components are then combined with the number of mines left: an
+arrangement putting M mines on the frontier leaves the rest for the
+unconstrained cells, which it can place in comb(unconstrained,
+remaining - M) ways, and every arrangement of the whole board is
+equally likely. A cell's mine probability is the weighted share of the
+arrangements with a mine in it.
+"""
+
+import math
+import time
+
+# Seconds mine_probabilities may take before giving up
+TIME_LIMIT = 0.1
+
+# Components with more cells are not enumerated
+MAX_COMPONENT = 400
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+def components(constraints):
+    """
+    Groups (cells, count) constraints into lists whose cells never
+    appear in a constraint of another list.
+    """
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        cells = iter(cells)
+        root = find(next(cells))
+        for cell in cells:
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    groups = {}
+    for constraint in constraints:
+        groups.setdefault(find(next(iter(constraint[0]))), []).append(constraint)
+    return list(groups.values())
+
+
+def enumerate_component(constraints, deadline):
+    """
+    Counts the mine assignments to the cells of a component that meet
+    all its constraints. Returns (counts, cell_counts): counts[m] is the
+    number of assignments with m mines and cell_counts[m][cell] the
+    number of those with a mine in cell.
+    """
+    cell_constraints = {}
+    for index, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            cell_constraints.setdefault(cell, []).append(index)
+
+    # Assign cells constraint by constraint so conflicts show up early
+    order = []
+    seen = set()
+    for cells, _ in constraints:
+        for cell in sorted(cells):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+
+    if len(order) > MAX_COMPONENT:
+        raise SolverTimeout()
+
+    need = [count for _, count in constraints]
+    left = [len(cells) for cells, _ in constraints]
+    mined = []
+    counts = [0] * (len(order) + 1)
+    cell_counts = [{} for _ in range(len(order) + 1)]
+
+    def assign(i):
+        if time.perf_counter() > deadline:
+            raise SolverTimeout()
+        if i == len(order):
+            mines = len(mined)
+            counts[mines] += 1
+            for cell in mined:
+                cell_counts[mines][cell] = cell_counts[mines].get(cell, 0) + 1
+            return
+
+        cell = order[i]
+        indices = cell_constraints[cell]
+        for value in (0, 1):
+            ok = True
+            for index in indices:
+                left[index] -= 1
+                need[index] -= value
+                if need[index] < 0 or need[index] > left[index]:
+                    ok = False
+            if ok:
+                if value:
+                    mined.append(cell)
+                assign(i + 1)
+                if value:
+                    mined.pop()
+            for index in indices:
+                left[index] += 1
+                need[index] += value
+
+    assign(0)
+    return counts, cell_counts
+
+
+def normalized(values):
+    largest = max(values, default=0)
+    if not largest:
+        return values
+    return [value / largest for value in values]
+
+
+def convolve(a, b):
+    out = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return out
+
+
+def mine_probabilities(constraints, unconstrained, remaining,
+                       time_limit=TIME_LIMIT):
+    """
+    Returns ({cell: mine probability} for every frontier cell, mine
+    probability of each unconstrained cell or None if there are none),
+    or None if the constraints cannot all hold, a component is larger
+    than MAX_COMPONENT cells or time_limit seconds run out.
+    """
+    deadline = time.perf_counter() + time_limit
+    constraints = [(cells, count) for cells, count in constraints if cells]
+    groups = components(constraints)
+    try:
+        solved = [enumerate_component(group, deadline) for group in groups]
+    except SolverTimeout:
+        return None
+    if any(not any(counts) for counts, _ in solved):
+        return None
+
+    # Relative number of ways to place the other mines off the frontier
+    frontier = sum(len(counts) - 1 for counts, _ in solved)
+
+    def log_ways(mines):
+        rest = remaining - mines
+        if rest < 0 or rest > unconstrained:
+            return None
+        return (math.lgamma(unconstrained + 1) - math.lgamma(rest + 1) -
+                math.lgamma(unconstrained - rest + 1))
+
+    logs = [log_ways(mines) for mines in range(frontier + 1)]
+    if all(value is None for value in logs):
+        return None
+    top = max(value for value in logs if value is not None)
+    ways = [0.0 if value is None else math.exp(value - top) for value in logs]
+
+    # Each component's counts are scaled by the same factor as its cell
+    # counts, so the scale cancels out of its probabilities
+    scaled = []
+    for counts, cell_counts in solved:
+        scale = max(counts)
+        scaled.append(([count / scale for count in counts],
+                       [{cell: n / scale for cell, n in by_cell.items()}
+                        for by_cell in cell_counts]))
+
+    # after[c][j]: weight of arrangements of components c onwards given
+    # j mines already on earlier components
+    after = [ways]
+    for counts, _ in reversed(scaled):
+        following = after[-1]
+        after.append(normalized([
+            sum(count * following[j + m] for m, count in enumerate(counts)
+                if j + m < len(following))
+            for j in range(len(following))]))
+        if time.perf_counter() > deadline:
+            return None
+    after.reverse()
+
+    probabilities = {}
+    before = [1.0]
+    for c, (counts, cell_counts) in enumerate(scaled):
+        following = after[c + 1]
+        factor = [sum(p * following[i + m] for i, p in enumerate(before)
+                      if i + m < len(following))
+                  for m in range(len(counts))]
+        total = sum(count * factor[m] for m, count in enumerate(counts))
+        if not total:
+            return None
+        for m, by_cell in enumerate(cell_counts):
+            for cell, n in by_cell.items():
+                probabilities[cell] = probabilities.get(cell, 0.0) + \
+                    n * factor[m] / total
+        # cells that are a mine in no assignment
+        for cells, _ in groups[c]:
+            for cell in cells:
+                probabilities.setdefault(cell, 0.0)
+        before = normalized(convolve(before, counts))
+        if time.perf_counter() > deadline:
+            return None
+
+    other = None
+    if unconstrained:
+        weights = [p * ways[mines] for mines, p in enumerate(before)]
+        total = sum(weights)
+        if not total:
+            return None
+        other = sum(weight * (remaining - mines) for mines, weight
+                    in enumerate(weights)) / total / unconstrained
+    return probabilities, other